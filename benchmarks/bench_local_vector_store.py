@@ -0,0 +1,56 @@
+'''
+Retrieval latency of LocalVectorStore for hybrid (alpha=0.6, top 5) queries.
+Uses seeded random embeddings and texts so runs are reproducible and need no model or Data files.
+
+    python benchmarks/bench_local_vector_store.py --docs 20000 --dim 1024
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryMode  # noqa: E402
+from LocalVectorStore import LocalVectorStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=1024)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocab = [f"term{i}" for i in range(5000)]
+    nodes = [{"id": str(i), "text": " ".join(rng.choice(vocab, size=60)), "metadata": {}, "ref_doc_id": None}
+             for i in range(args.docs)]
+    embeddings = rng.standard_normal((args.docs, args.dim), dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        LocalVectorStore(nodes, embeddings).persist(persist_dir)
+        start = time.perf_counter()
+        store = LocalVectorStore.load(persist_dir)
+        load_time = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.queries):
+            query = VectorStoreQuery(query_embedding=rng.standard_normal(args.dim).tolist(),
+                                     query_str=" ".join(rng.choice(vocab, size=8)),
+                                     similarity_top_k=5, mode=VectorStoreQueryMode.HYBRID, alpha=0.6)
+            start = time.perf_counter()
+            store.query(query)
+            latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies) * 1e3
+    print(f"docs: {args.docs}  dim: {args.dim}  load: {load_time * 1e3:.1f} ms")
+    print(f"hybrid query p50: {np.percentile(latencies, 50):.2f} ms  "
+          f"p95: {np.percentile(latencies, 95):.2f} ms  p99: {np.percentile(latencies, 99):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
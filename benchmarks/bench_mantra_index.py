@@ -0,0 +1,72 @@
+'''
+Micro-benchmark comparing the MantraIndex point lookup against the boolean-mask scan
+that MantraToolSpec used before the index was added.
+Runs on a synthetic RigVeda-shaped frame, so no Data files are needed.
+
+    python benchmarks/bench_mantra_index.py --mandalas 10 --shuktas 100 --mantras 20
+'''
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from MantraIndex import MantraIndex  # noqa: E402
+
+
+def build_frame(mandalas, shuktas, mantras):
+    rows = [{'mantra_number': f'1.{m}.{s}.{n}', 'scripture_name': 'RigVeda',
+             'MandalaNumber': m, 'ShuktaNumber': s, 'MantraNumber': str(n)}
+            for m in range(1, mandalas + 1) for s in range(1, shuktas + 1) for n in range(1, mantras + 1)]
+    return pd.DataFrame(rows)
+
+
+def mask_lookup(df, scripture_name, mandala, shukta, mantra):
+    conditions = (df['scripture_name'].str.lower() == scripture_name.lower()) & \
+                 (df['MandalaNumber'] == mandala) & \
+                 (df['ShuktaNumber'] == shukta) & \
+                 (df['MantraNumber'] == str(mantra))
+    return df[conditions].index.tolist()
+
+
+def time_per_call(fn, addresses):
+    start = time.perf_counter()
+    for address in addresses:
+        fn(*address)
+    return (time.perf_counter() - start) / len(addresses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mandalas', type=int, default=10)
+    parser.add_argument('--shuktas', type=int, default=100)
+    parser.add_argument('--mantras', type=int, default=20)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    df = build_frame(args.mandalas, args.shuktas, args.mantras)
+    start = time.perf_counter()
+    index = MantraIndex(df, id_column='mantra_number')
+    build_time = time.perf_counter() - start
+
+    rng = random.Random(0)
+    addresses = [('RigVeda', rng.randint(1, args.mandalas), rng.randint(1, args.shuktas), rng.randint(1, args.mantras))
+                 for _ in range(args.lookups)]
+    assert all(mask_lookup(df, *a) == index.lookup(a[0], MandalaNumber=a[1], ShuktaNumber=a[2], MantraNumber=a[3])
+               for a in addresses[:20])
+
+    mask_time = time_per_call(lambda *a: mask_lookup(df, *a), addresses)
+    index_time = time_per_call(
+        lambda s, m, sh, n: index.lookup(s, MandalaNumber=m, ShuktaNumber=sh, MantraNumber=n), addresses)
+
+    print(f"rows: {len(df)}  index build: {build_time * 1e3:.1f} ms")
+    print(f"mask lookup:  {mask_time * 1e6:10.1f} us/call")
+    print(f"index lookup: {index_time * 1e6:10.1f} us/call")
+    print(f"speedup:      {mask_time / index_time:10.0f}x")
+
+
+if __name__ == '__main__':
+    main()
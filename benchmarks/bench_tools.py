@@ -0,0 +1,140 @@
+'''
+Latency and memory of the lookup tools the agent calls: ScriptureDescriptionToolSpec.get_description and
+MantraToolSpec.get_translation / get_vedamantra_details / get_vedamantra_summary.
+
+Each tool is called once per generated address (a cold pass) and then again over the same addresses
+(a warm pass, which shows the effect of any result cache). Addresses are drawn from the loaded
+catalogues in the forms the agent produces: by mantra id or by level numbers, mixed case scripture
+names, ints or strings, plus about 10% addresses that do not exist. Load time and memory (traced
+Python allocations and peak RSS) are reported per tool spec.
+
+Runs against <root>/Data; when the mantra files are not there, a synthetic catalogue with the same
+layout is generated (see synthetic_data.py).
+
+    python benchmarks/bench_tools.py --addresses 5000
+'''
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+from FunctionTools import MantraToolSpec, ScriptureDescriptionToolSpec  # noqa: E402
+from ToolCache import tool_cache_stats  # noqa: E402
+from synthetic_data import SCRIPTURES, prepare_root  # noqa: E402
+
+SCRIPTURE_NAMES = ("RigVeda", "SamaVeda", "ShuklaYajurVeda", "KrishnaYajurVeda", "AtharvaVeda")
+
+
+def _vary(rng, value):
+    # the agent passes numbers both as ints and as strings
+    return str(value) if rng.random() < 0.5 else int(value)
+
+
+def mantra_addresses(df, count, rng):
+    '''
+    Returns `count` keyword-argument dicts addressing rows of the vedamantra frame.
+    '''
+    rows = df[df['scripture_name'].isin(SCRIPTURES)].to_dict(orient='records')
+    addresses = []
+    for _ in range(count):
+        row = rng.choice(rows)
+        if rng.random() < 0.2:
+            addresses.append({"mantraid": row['mantra_number']})
+            continue
+        scripture_name = row['scripture_name']
+        level_column = SCRIPTURES[scripture_name][1]
+        mantra = int(float(row['MantraNumber']))
+        if rng.random() < 0.1:
+            mantra += 1000
+        addresses.append({"scripture_name": rng.choice((scripture_name, scripture_name.lower())),
+                          level_column: _vary(rng, float(row[level_column])),
+                          "ShuktaNumber": _vary(rng, float(row['ShuktaNumber'])),
+                          "MantraNumber": _vary(rng, mantra)})
+    return addresses
+
+
+def description_addresses(df, count, rng):
+    rows = df[df['scripture_name'].isin(SCRIPTURE_NAMES)].to_dict(orient='records')
+    addresses = []
+    for _ in range(count):
+        row = rng.choice(rows)
+        address = {"level_0": rng.choice((row['scripture_name'], row['scripture_name'].lower()))}
+        for level in ("level_1", "level_2", "level_3"):
+            if not isinstance(row[level], str):
+                break
+            address[level] = row[level]
+        if rng.random() < 0.1:
+            address["level_1"] = "1000"
+        addresses.append(address)
+    return addresses
+
+
+def timed_load(name, load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    load()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name}: loaded in {seconds:.2f}s, peak traced allocations {peak / 2 ** 20:.1f} MiB")
+
+
+def time_calls(fn, addresses):
+    timings = np.empty(len(addresses))
+    for i, address in enumerate(addresses):
+        start = time.perf_counter()
+        fn(**address)
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def report(name, timings):
+    p50, p90, p99 = np.percentile(timings, [50, 90, 99]) * 1e6
+    print(f"  {name:<26} p50 {p50:9.1f} us  p90 {p90:9.1f} us  p99 {p99:9.1f} us  "
+          f"max {timings.max() * 1e6:9.1f} us  total {timings.sum():7.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=os.path.join(BENCHMARKS_DIR, '..'),
+                        help="directory containing Data/ (default: the repository)")
+    parser.add_argument('--addresses', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # the tool specs use paths relative to the repository root
+    os.chdir(prepare_root(os.path.abspath(args.root), seed=args.seed))
+    rng = random.Random(args.seed)
+
+    description_spec = ScriptureDescriptionToolSpec()
+    mantra_spec = MantraToolSpec()
+    timed_load("ScriptureDescriptionToolSpec", lambda: description_spec.df)
+    timed_load("MantraToolSpec", mantra_spec._load)
+
+    benchmarks = [
+        ("get_description", description_spec.get_description,
+         description_addresses(description_spec.df, args.addresses, rng)),
+    ]
+    mantra_calls = mantra_addresses(mantra_spec.df_vedamantra, args.addresses, rng)
+    for name in MantraToolSpec.spec_functions:
+        benchmarks.append((name, getattr(mantra_spec, name), mantra_calls))
+
+    for label in ("cold", "warm"):
+        print(f"{label} pass, {args.addresses} calls per tool:")
+        for name, fn, addresses in benchmarks:
+            report(name, time_calls(fn, addresses))
+
+    for name, stats in tool_cache_stats().items():
+        print(f"{name} cache: {stats}")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
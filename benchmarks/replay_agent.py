@@ -0,0 +1,205 @@
+'''
+Replays a recorded question log through the full agent (same tools, context, session pool and answer
+cache as the app) with no network access:
+ - the LLM is a stand-in that returns the completions recorded in the log, in order,
+ - the vector store is a LocalVectorStore built in memory from the Data files with mock embeddings,
+ - token counts use a whitespace tokenizer instead of tiktoken.
+Tool calls, data loading, the ReAct loop and the caches all run for real, so per-turn latency and the
+per-stage breakdown from the tracer are comparable between runs; a turn (not answered from the answer
+cache) that does not call the tools listed in its `expected_tools` is reported as a regression
+(non-zero exit status). The answer cache is off unless --answer-cache is given, so by default every
+turn runs the agent and is checked; with it, as in the app, only the first question of a session is
+looked up or stored.
+
+Each line of the log is a JSON object:
+    session_id      turns with the same id share agent memory
+    question        the user question
+    agent_steps     the agent LLM's completions, in order (ReAct "Thought/Action/Action Input" steps
+                    and a final "Answer"); a direct answer is used once they run out
+    tool_llm        completions for LLM calls made inside tools (pandas code, answer synthesis)
+    expected_tools  optional list of the tools the turn must call
+
+    python benchmarks/replay_agent.py benchmarks/replay_questions.jsonl --llm-latency 0.5
+'''
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from typing import Any
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+from llama_index.core import MockEmbedding, Settings, StorageContext, VectorStoreIndex, set_global_tokenizer  # noqa: E402
+from llama_index.core.bridge.pydantic import PrivateAttr  # noqa: E402
+from llama_index.core.callbacks import CallbackManager  # noqa: E402
+from llama_index.core.llms import ChatMessage, CompletionResponse, CustomLLM, LLMMetadata, MessageRole  # noqa: E402
+from llama_index.core.llms.callbacks import llm_completion_callback  # noqa: E402
+
+import VedaAgent  # noqa: E402
+from AgentPool import AgentPool  # noqa: E402
+from AnswerCache import AnswerCache  # noqa: E402
+from LocalVectorStore import LocalVectorStore, load_documents  # noqa: E402
+from Startup import LazyQueryEngine  # noqa: E402
+from Tracing import LatencyTracer  # noqa: E402
+from synthetic_data import prepare_root  # noqa: E402
+
+FINAL_ANSWER = "Thought: I can answer without using any more tools.\nAnswer: No recorded answer."
+TOOL_RESPONSE = "No recorded response."
+
+
+class ReplayLLM(CustomLLM):
+    '''
+    Stand-in LLM that returns the scripted completions in order, then `default`, after `latency` seconds.
+    '''
+    default: str = FINAL_ANSWER
+    latency: float = 0.0
+    _responses: Any = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._responses = deque()
+
+    @property
+    def metadata(self):
+        return LLMMetadata(model_name="replay", is_chat_model=False)
+
+    def script(self, responses):
+        self._responses = deque(responses)
+
+    def _next(self):
+        time.sleep(self.latency)
+        return self._responses.popleft() if self._responses else self.default
+
+    @llm_completion_callback()
+    def complete(self, prompt, formatted=False, **kwargs):
+        return CompletionResponse(text=self._next())
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt, formatted=False, **kwargs):
+        text = self._next()
+
+        def gen():
+            streamed = ""
+            for token in text.split(" "):
+                delta = token if not streamed else " " + token
+                streamed += delta
+                yield CompletionResponse(text=streamed, delta=delta)
+        return gen()
+
+
+def build_vector_store(data_dir, embed_model):
+    vector_store = LocalVectorStore()
+    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    VectorStoreIndex.from_documents(load_documents(data_dir), storage_context=storage_context,
+                                    embed_model=embed_model)
+    return vector_store
+
+
+def run_turn(agent, question, stream):
+    if stream:
+        response = agent.stream_chat(question)
+        return "".join(response.response_gen)
+    return agent.chat(question).response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help="JSON Lines question log")
+    parser.add_argument('--root', default=os.path.join(BENCHMARKS_DIR, '..'),
+                        help="directory containing Data/ (default: the repository)")
+    parser.add_argument('--llm-latency', type=float, default=0.0,
+                        help="seconds each stand-in LLM call takes, to approximate the real LLM")
+    parser.add_argument('--stream', action='store_true', help="use stream_chat, as the app does by default")
+    parser.add_argument('--repeat', type=int, default=1, help="replay the log this many times")
+    parser.add_argument('--answer-cache', action='store_true',
+                        help="put the app's answer cache in front of the agent (cached turns are not checked)")
+    parser.add_argument('--output', help="write the per-turn trace summaries here as JSON Lines")
+    args = parser.parse_args()
+
+    with open(args.log, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    os.chdir(prepare_root(os.path.abspath(args.root)))
+
+    set_global_tokenizer(str.split)
+    tracer = LatencyTracer(tokenizer=str.split)
+    callback_manager = CallbackManager([tracer])
+    agent_llm = ReplayLLM(latency=args.llm_latency, callback_manager=callback_manager)
+    tool_llm = ReplayLLM(default=TOOL_RESPONSE, latency=args.llm_latency, callback_manager=callback_manager)
+    embed_model = MockEmbedding(embed_dim=64, callback_manager=callback_manager)
+    Settings.callback_manager = callback_manager
+    Settings.llm = tool_llm
+    Settings.embed_model = embed_model
+
+    start = time.perf_counter()
+    vector_store = build_vector_store("Data", embed_model)
+    print(f"Built the stand-in vector store ({len(vector_store.nodes)} nodes) in {time.perf_counter() - start:.1f}s")
+
+    tools = VedaAgent.build_tools(VedaAgent.build_vector_query_engine(vector_store),
+                                  LazyQueryEngine(lambda: VedaAgent.build_pandas_query_engine(tracer=tracer)),
+                                  tracer=tracer)
+    context = VedaAgent.build_context()
+    agent_pool = AgentPool()
+    # mock embeddings are all alike, so only exact matches would be meaningful
+    answer_cache = AnswerCache() if args.answer_cache else None
+
+    turn_seconds, regressions, summaries = [], 0, []
+    for iteration in range(args.repeat):
+        for record in records:
+            session_id = f"{iteration}-{record.get('session_id', 'default')}"
+            question = record["question"]
+            session = agent_pool.get(session_id, lambda: VedaAgent.create_react_agent(
+                tools, agent_llm, context, callback_handlers=[tracer], verbose=False))
+            agent_llm.script(record.get("agent_steps", []))
+            tool_llm.script(record.get("tool_llm", []))
+
+            with tracer.turn(session_id, question) as trace:
+                standalone = answer_cache is not None and not session["agent"].memory.get_all()
+                answer = answer_cache.get(question) if standalone else None
+                cached = answer is not None
+                if cached:
+                    # as in the app, so follow-up questions are not taken for new conversations
+                    session["agent"].memory.put(ChatMessage(role=MessageRole.USER, content=question))
+                    session["agent"].memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=answer))
+                else:
+                    answer = run_turn(session["agent"], question, args.stream)
+                    if standalone:
+                        answer_cache.put(question, answer)
+            summary = trace.summary()
+            summaries.append(summary)
+            turn_seconds.append(summary["total_seconds"])
+
+            called = sorted(stage[len("tool:"):] for stage in summary["stages"] if stage.startswith("tool:"))
+            status = "  (answer cache)" if cached else ""
+            if not cached and "expected_tools" in record and called != sorted(record["expected_tools"]):
+                regressions += 1
+                status = f"  REGRESSION: expected {sorted(record['expected_tools'])}"
+            print(f"{summary['total_seconds'] * 1000:9.1f} ms  {question[:60]:<60}  tools {called}{status}")
+
+    stages = defaultdict(lambda: [0, 0.0])
+    for summary in summaries:
+        for stage, values in summary["stages"].items():
+            stages[stage][0] += values["calls"]
+            stages[stage][1] += values["seconds"]
+    p50, p90 = np.percentile(turn_seconds, [50, 90]) * 1000
+    print(f"\n{len(turn_seconds)} turns: p50 {p50:.1f} ms  p90 {p90:.1f} ms  max {max(turn_seconds) * 1000:.1f} ms  "
+          f"total {sum(turn_seconds):.2f} s")
+    for stage, (calls, seconds) in sorted(stages.items(), key=lambda item: -item[1][1]):
+        print(f"  {stage:<30} {calls:6d} calls  {seconds * 1000:10.1f} ms")
+    if answer_cache is not None:
+        print(f"answer cache: {answer_cache.stats()}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for summary in summaries:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    if regressions:
+        print(f"{regressions} turn(s) did not call the expected tools")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
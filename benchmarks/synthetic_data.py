@@ -0,0 +1,96 @@
+'''
+Synthetic stand-ins for the Data files that are not checked in (translations, vedamantra content and
+details), with the same columns and mantra_json layout as the real files. Used by the tool benchmark
+and the replay harness when the real files are missing.
+'''
+import json
+import os
+import random
+import shutil
+import tempfile
+
+import pandas as pd
+
+DATA_FILES = ("trans_Rig_Ath_index_v2.csv", "veda_content_modified_v3.csv", "veda_content_details.csv")
+
+MAHATMAS = ("Tulsi Ram", "Dayananda Saraswati")
+DEVATAS = ("agniḥ", "indraḥ", "varuṇaḥ", "mitrāvaruṇau", "aśvinau", "viśvedevāḥ", "somaḥ")
+RISHIS = ("madhucchandā vaiśvāmitraḥ", "medhātithiḥ kāṇvaḥ", "atharvā", "vasiṣṭhaḥ")
+CHANDAS = ("gāyatrī", "triṣṭup", "anuṣṭup", "jagatī")
+SWARAS = ("ṣaḍjaḥ", "gāndhāraḥ", "niṣādaḥ", "dhaivataḥ")
+
+# scripture -> (scripture number in mantra ids, first address level column, key of that level in mantraHeader)
+SCRIPTURES = {
+    "RigVeda": (1, "MandalaNumber", "mandala"),
+    "AtharvaVeda": (2, "KandahNumber", "kandah"),
+}
+
+
+def _words(rng, n):
+    return " ".join(rng.choice(("agnim", "īḻe", "purohitam", "yajñasya", "devam", "ṛtvijam", "hotāram",
+                                "ratnadhātamam", "the", "priest", "of", "sacrifice", "who", "brings", "wealth"))
+                    for _ in range(n))
+
+
+def _mantra_json(rng, level_key, details):
+    header = {"languageName": "IAST", level_key: {"shukta": {"mantra": details}}}
+    summary = [
+        {"languageName": "Sanskrit", "anvaya": _words(rng, 12)},
+        {"languageName": "IAST", "anvaya": _words(rng, 12), "mahatma": {"mahatmaName": MAHATMAS[0]}},
+        {"languageName": "English", "adhibautic": _words(rng, 25), "adhyatmic": _words(rng, 25),
+         "adhidaivic": _words(rng, 25)},
+    ]
+    return json.dumps({"mantraHeader": {"language": [{"languageName": "Sanskrit"}, header]},
+                       "mantraSummary": {"language": summary}}, ensure_ascii=False)
+
+
+def write_synthetic_data(data_dir, books=10, shuktas=20, mantras=10, seed=0):
+    '''
+    Writes RigVeda (mandala.shukta.mantra) and AtharvaVeda (kandah.shukta.mantra) catalogues of
+    books x shuktas x mantras each into `data_dir`.
+    '''
+    rng = random.Random(seed)
+    translations, contents, details = [], [], []
+    for scripture_name, (number, level_column, level_key) in SCRIPTURES.items():
+        for book in range(1, books + 1):
+            for shukta in range(1, shuktas + 1):
+                for mantra in range(1, mantras + 1):
+                    mantra_id = f"{number}.{book}.{shukta}.{mantra}"
+                    address = {"scripture_name": scripture_name, level_column: book,
+                               "ShuktaNumber": shukta, "MantraNumber": mantra}
+                    facets = {"DevataName": rng.choice(DEVATAS), "RishiName": rng.choice(RISHIS),
+                              "ChandaName": rng.choice(CHANDAS), "SwarahName": rng.choice(SWARAS)}
+                    vedamantra = _words(rng, 10)
+                    padapatha = _words(rng, 10)
+                    for mahatma in MAHATMAS:
+                        translations.append({"mantra_id": mantra_id, **address, "MahatmaName": mahatma,
+                                             "text": _words(rng, 30)})
+                    header_details = {"vedamantra": vedamantra, "padapatha": padapatha,
+                                      "devata": facets["DevataName"], "rishi": facets["RishiName"],
+                                      "chandah": facets["ChandaName"], "swarah": facets["SwarahName"]}
+                    contents.append({"mantra_number": mantra_id, **address,
+                                     "mantra_json": _mantra_json(rng, level_key, header_details)})
+                    details.append({"mantra_id": mantra_id, **address, **facets,
+                                    "vedamantra": vedamantra, "padapatha": padapatha})
+
+    os.makedirs(data_dir, exist_ok=True)
+    for name, rows in zip(DATA_FILES, (translations, contents, details)):
+        pd.DataFrame(rows).to_csv(os.path.join(data_dir, name), index=False, encoding='utf-8')
+
+
+def prepare_root(root, **kwargs):
+    '''
+    Returns `root` if its Data directory has the mantra files, else a temporary root with synthetic
+    mantra files and a copy of the scripture descriptions.
+    '''
+    data_dir = os.path.join(root, "Data")
+    if all(os.path.exists(os.path.join(data_dir, name)) for name in DATA_FILES):
+        return root
+    synthetic_root = tempfile.mkdtemp(prefix="veda_bot_bench_")
+    synthetic_data_dir = os.path.join(synthetic_root, "Data")
+    write_synthetic_data(synthetic_data_dir, **kwargs)
+    descriptions = os.path.join(data_dir, "scripture_descriptions.csv")
+    if os.path.exists(descriptions):
+        shutil.copy(descriptions, synthetic_data_dir)
+    print(f"Mantra data files not found under {data_dir}; using synthetic data in {synthetic_data_dir}")
+    return synthetic_root
@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class AgentPool:
+    '''
+    Session-scoped agents with bounded memory.
+    Each session gets its own agent (and chat memory) built by the caller's factory, while the heavy
+    immutable parts (tools, LLM client, indices) are shared through that factory. Sessions idle for
+    longer than `ttl_seconds` are evicted, and the least recently used session is evicted once more
+    than `max_sessions` are live.
+    '''
+
+    def __init__(self, max_sessions=200, ttl_seconds=30 * 60):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()  # session_id -> (session, last_used), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, session_id, factory):
+        '''
+        Returns the session for `session_id`, creating it with `factory()` if it does not exist or was evicted.
+        '''
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._sessions.pop(session_id, None)
+            session = entry[0] if entry is not None else factory()
+            self._sessions[session_id] = (session, now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict_expired(self, now):
+        # Entries are ordered by last use, so expired sessions are always at the front
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_WHITESPACE = re.compile(r'\s+')
+# the parts of a question that pick out a specific mantra or scripture; questions that differ only
+# in these embed almost identically, so a semantic hit must agree on them exactly
+_ADDRESS_TERMS = re.compile(r'\d+|\b(?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|'
+                            r'one|two|three|four|five|six|seven|eight|nine|ten|last)\b|'
+                            r'(?:rig|sama|shukla ?yajur|krishna ?yajur|yajur|atharva) ?veda')
+_WORDS = re.compile(r'[^\W\d_]+')
+# words that do not change what a question asks; every other word must match for a semantic hit
+_STOPWORDS = frozenset(
+    "a an the of in on at for to from by with and or is are was were be what which who whom whose how "
+    "me us tell please give show explain describe about this that these those its it do does can could "
+    "you i we my our there has have had".split())
+
+
+def normalize_query(text):
+    '''
+    Normalizes a question for exact-match caching: case, surrounding/repeated whitespace and
+    trailing punctuation are ignored.
+    '''
+    return _WHITESPACE.sub(' ', text.strip().lower()).rstrip(' ?.!')
+
+
+def address_terms(key):
+    '''
+    The numbers, ordinals and scripture names in a normalized question, in order.
+    '''
+    return tuple(term.replace(' ', '') for term in _ADDRESS_TERMS.findall(key))
+
+
+def content_terms(key):
+    '''
+    The words of a normalized question other than stopwords, e.g. 'devata', 'rishi', 'gāndhāraḥ'.
+    '''
+    return frozenset(word for word in _WORDS.findall(key) if word not in _STOPWORDS)
+
+
+def question_terms(key):
+    '''
+    What two questions must share for one to be answered with the other's cached answer.
+    '''
+    return address_terms(key), content_terms(key)
+
+
+class AnswerCache:
+    '''
+    Response cache in front of the agent, keyed on the normalized question text.
+    When `embed_fn` is given, a miss on the exact key falls back to the nearest cached question by
+    cosine similarity of its embedding, and is served if the similarity is at least
+    `similarity_threshold` and both questions have the same numbers, scriptures and words other than
+    stopwords (template questions that differ in one of these embed almost identically). Entries
+    expire after `ttl_seconds`; beyond `max_size` the least recently used entry is evicted.
+    '''
+
+    def __init__(self, max_size=1000, ttl_seconds=24 * 60 * 60, embed_fn=None, similarity_threshold=0.95):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (answer, unit embedding or None, created), least recently used first
+        self._pending_embeddings = OrderedDict()  # embeddings computed by a missed get(), reused by put()
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        '''
+        Returns the cached answer for `query`, or None on a miss.
+        '''
+        key = normalize_query(query)
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.embed_fn is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        embedding = self._embed(key)
+        with self._lock:
+            self._pending_embeddings[key] = embedding
+            while len(self._pending_embeddings) > 64:
+                self._pending_embeddings.popitem(last=False)
+
+            terms = question_terms(key)
+            keys = [k for k, (_, e, _) in self._entries.items() if e is not None and question_terms(k) == terms]
+            if keys:
+                similarities = np.stack([self._entries[k][1] for k in keys]) @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.semantic_hits += 1
+                    return self._entries[keys[best]][0]
+            self.misses += 1
+            return None
+
+    def put(self, query, answer):
+        key = normalize_query(query)
+        embedding = None
+        if self.embed_fn is not None:
+            with self._lock:
+                embedding = self._pending_embeddings.pop(key, None)
+            if embedding is None:
+                embedding = self._embed(key)
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (answer, embedding, time.monotonic())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending_embeddings.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+    def _embed(self, text):
+        embedding = np.asarray(self.embed_fn(text), dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def _evict_expired(self, now):
+        # Entries are re-inserted on put but only moved on hits, so expired ones can sit anywhere
+        expired = [key for key, (_, _, created) in self._entries.items() if now - created > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
@@ -0,0 +1,183 @@
+'''
+Embedding service layer for query embeddings.
+
+BatchingEmbedding wraps any llama_index embedding model and adds
+ - an LRU cache of query embeddings,
+ - a micro-batcher that merges queries arriving from concurrent sessions within `max_wait_seconds`
+   into one forward pass of up to `max_batch_size` queries,
+ - per-batch timings (logged and available from `stats()`).
+Document embeddings (ingestion) are passed straight through to the wrapped model.
+`build_embed_model` creates the wrapped model with the torch, dynamically quantized or ONNX backend.
+'''
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+EMBED_BACKENDS = ("torch", "quantized", "onnx")
+
+
+def build_embed_model(model_name="BAAI/bge-large-en-v1.5", backend="torch", embed_batch_size=8,
+                      onnx_path="Data/onnx_embedding"):
+    '''
+    Creates the embedding model for `backend`:
+     - "torch": HuggingFaceEmbedding as is,
+     - "quantized": HuggingFaceEmbedding with its Linear layers dynamically quantized to int8 (CPU only),
+     - "onnx": OptimumEmbedding over an ONNX export in `onnx_path`, exported on first use
+       (needs llama-index-embeddings-huggingface-optimum).
+    A smaller model (e.g. BAAI/bge-small-en-v1.5) changes the embedding size, so the vector index has to be
+    rebuilt with the same model.
+    '''
+    if backend not in EMBED_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}. Expected one of {EMBED_BACKENDS}.")
+
+    if backend == "onnx":
+        try:
+            from llama_index.embeddings.huggingface_optimum import OptimumEmbedding
+        except ImportError as e:
+            raise ImportError("The onnx embedding backend needs `pip install llama-index-embeddings-huggingface-optimum`.") from e
+        import os
+        if not os.path.exists(onnx_path):
+            OptimumEmbedding.create_and_save_optimum_model(model_name, onnx_path)
+        return OptimumEmbedding(folder_name=onnx_path, embed_batch_size=embed_batch_size)
+
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    model = HuggingFaceEmbedding(model_name=model_name, embed_batch_size=embed_batch_size,
+                                 device="cpu" if backend == "quantized" else None)
+    if backend == "quantized":
+        import torch
+        model._model = torch.quantization.quantize_dynamic(model._model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def _query_batch_fn(model):
+    # HuggingFace/Optimum models embed a whole list in one forward pass through `_embed`; the
+    # query instruction has to be applied here since `_get_query_embedding` is bypassed
+    if hasattr(model, "_embed"):
+        from llama_index.embeddings.huggingface.utils import format_query
+        return lambda queries: model._embed(
+            [format_query(query, model.model_name, getattr(model, "query_instruction", None)) for query in queries])
+    return lambda queries: [model._get_query_embedding(query) for query in queries]
+
+
+class BatchingEmbedding(BaseEmbedding):
+    '''
+    Caches and micro-batches query embeddings in front of another embedding model.
+    '''
+    _model: Any = PrivateAttr()
+    _batch_fn: Any = PrivateAttr()
+    _cache: Any = PrivateAttr()
+    _cache_size: int = PrivateAttr()
+    _max_batch_size: int = PrivateAttr()
+    _max_wait_seconds: float = PrivateAttr()
+    _queue: Any = PrivateAttr()
+    _lock: Any = PrivateAttr()
+    _worker: Any = PrivateAttr()
+    _stats: Any = PrivateAttr()
+    _batch_timings: Any = PrivateAttr()
+
+    def __init__(self, model, cache_size=1024, max_batch_size=16, max_wait_seconds=0.005, **kwargs):
+        super().__init__(model_name=model.model_name, embed_batch_size=model.embed_batch_size, **kwargs)
+        self._model = model
+        self._batch_fn = _query_batch_fn(model)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._max_batch_size = max_batch_size
+        self._max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats = {"cache_hits": 0, "cache_misses": 0, "batches": 0, "batched_queries": 0}
+        self._batch_timings = deque(maxlen=100)  # (batch size, seconds) of the most recent batches
+
+    @classmethod
+    def class_name(cls):
+        return "BatchingEmbedding"
+
+    def _get_query_embedding(self, query):
+        return self._submit(query).result()
+
+    async def _aget_query_embedding(self, query):
+        return await asyncio.wrap_future(self._submit(query))
+
+    def _get_text_embedding(self, text):
+        return self._model._get_text_embedding(text)
+
+    def _get_text_embeddings(self, texts):
+        return self._model._get_text_embeddings(texts)
+
+    def stats(self):
+        with self._lock:
+            timings = list(self._batch_timings)
+            return {**self._stats, "cache_size": len(self._cache), "recent_batches": timings}
+
+    def _submit(self, query):
+        future = Future()
+        with self._lock:
+            embedding = self._cache.get(query)
+            if embedding is not None:
+                self._cache.move_to_end(query)
+                self._stats["cache_hits"] += 1
+                future.set_result(embedding)
+                return future
+            self._stats["cache_misses"] += 1
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+        self._queue.put((query, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait_seconds
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._embed_batch(batch)
+
+    def _embed_batch(self, batch):
+        # identical queries from different sessions share one row of the batch
+        futures = OrderedDict()
+        for query, future in batch:
+            futures.setdefault(query, []).append(future)
+        queries = list(futures)
+
+        start = time.perf_counter()
+        try:
+            embeddings = self._batch_fn(queries)
+        except Exception as e:
+            for waiting in futures.values():
+                for future in waiting:
+                    future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+        logger.info("embedded batch of %d queries in %.3fs", len(queries), elapsed)
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["batched_queries"] += len(queries)
+            self._batch_timings.append((len(queries), elapsed))
+            for query, embedding in zip(queries, embeddings):
+                self._cache[query] = embedding
+                self._cache.move_to_end(query)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        for query, embedding in zip(queries, embeddings):
+            for future in futures[query]:
+                future.set_result(embedding)
@@ -1,8 +1,16 @@
 import json
-import chardet
-import streamlit as st
+import threading
 import pandas as pd
 from llama_index.core.tools.tool_spec.base import BaseToolSpec
+from MantraIndex import MantraIndex, normalize_key
+from MantraStore import load_store
+from Startup import detect_encoding, timed_stage
+from ToolCache import cached_tool
+from VedaFacets import VedaFacets
+
+# Lookup results are memoized on normalized arguments (see ToolCache.cached_tool)
+TOOL_CACHE_SIZE = 4096
+TOOL_CACHE_TTL_SECONDS = 24 * 60 * 60
 
 class ScriptureDescriptionToolSpec(BaseToolSpec):
     '''
@@ -16,34 +24,43 @@ class ScriptureDescriptionToolSpec(BaseToolSpec):
     # Define the functions that we export to the LLM
     spec_functions = ["get_description"]
 
-    with open("Data/scripture_descriptions.csv", 'rb') as f:
-        result = chardet.detect(f.read())
+    DESCRIPTION_CSV_PATH = "Data/scripture_descriptions.csv"
+    _df = None
+    _load_lock = threading.Lock()
 
-    encoding = result['encoding']
-    df = pd.read_csv("Data/scripture_descriptions.csv", encoding=encoding)
+    @property
+    def df(self):
+        # Loaded on first use (not at import) and shared by all instances
+        if ScriptureDescriptionToolSpec._df is None:
+            with self._load_lock:
+                if ScriptureDescriptionToolSpec._df is None:
+                    with timed_stage("scripture descriptions"):
+                        encoding = detect_encoding(self.DESCRIPTION_CSV_PATH)
+                        ScriptureDescriptionToolSpec._df = pd.read_csv(self.DESCRIPTION_CSV_PATH, encoding=encoding)
+        return ScriptureDescriptionToolSpec._df
 
-    @st.cache_data
-    def get_description(_self, level_0, level_1:int=None, level_2:int=None, level_3:int=None):
+    @cached_tool(maxsize=TOOL_CACHE_SIZE, ttl_seconds=TOOL_CACHE_TTL_SECONDS)
+    def get_description(self, level_0, level_1:int=None, level_2:int=None, level_3:int=None):
         """
         To get the description or basic information about vedas/mandalas/kandas/shukatas/archakah/adhyaya and others.
         """
         try:
             if level_3 is not None:
                 # Case with Level-2 specified
-                result = _self.df[(_self.df['scripture_name'].str.lower() == level_0.lower())
-                                  & (_self.df['level_1'] == str(level_1))
-                                  & (_self.df['level_2'] == str(level_2)) & (_self.df['level_3'] == str(level_3))]
+                result = self.df[(self.df['scripture_name'].str.lower() == normalize_key(level_0))
+                                 & (self.df['level_1'] == normalize_key(level_1))
+                                 & (self.df['level_2'] == normalize_key(level_2)) & (self.df['level_3'] == normalize_key(level_3))]
             elif level_2 is not None:
                 # Case with Level-2 specified
-                result = _self.df[(_self.df['scripture_name'].str.lower() == level_0.lower())
-                                  & (_self.df['level_1'] == str(level_1)) & (_self.df['level_2'] == str(level_2))]
+                result = self.df[(self.df['scripture_name'].str.lower() == normalize_key(level_0))
+                                 & (self.df['level_1'] == normalize_key(level_1)) & (self.df['level_2'] == normalize_key(level_2))]
             elif level_1 is not None:
                 # Case with Level-1 specified
-                result = _self.df[(_self.df['scripture_name'].str.lower() == level_0.lower())
-                                  & (_self.df['level_1'] == str(level_1))]
+                result = self.df[(self.df['scripture_name'].str.lower() == normalize_key(level_0))
+                                 & (self.df['level_1'] == normalize_key(level_1))]
             else:
                 # Case with only Level-0 specified
-                result = _self.df[_self.df['scripture_name'].str.lower() == level_0.lower()]
+                result = self.df[self.df['scripture_name'].str.lower() == normalize_key(level_0)]
 
             return result.iloc[0].to_dict()
         except IndexError as e:
@@ -64,14 +81,64 @@ class MantraToolSpec(BaseToolSpec):
 
     TRANSLATION_CSV_PATH = 'Data/trans_Rig_Ath_index_v2.csv'
     VEDAMANTRA_CSV_PATH = "Data/veda_content_modified_v3.csv"
+    VEDAMANTRA_STORE_PATH = "Data/veda_content_store.pkl"
+
+    # Location of the mantra details inside mantraHeader.language[1] for each scripture
+    DETAILS_PATH = {
+        'rigveda': ('mandala', 'shukta', 'mantra'),
+        'atharvaveda': ('kandah', 'shukta', 'mantra'),
+        'samaveda': ('archikah',),
+        'krishnayajurveda': ('kandah', 'prapatak', 'anuvak'),
+    }
+    DEFAULT_DETAILS_PATH = ('adhyaya', 'mantra')
+
+    # Attributes populated by `_load` on first access
+    _LAZY_ATTRIBUTES = ("df_translation", "df_vedamantra", "mantra_headers", "mantra_summaries",
+                        "translation_index", "vedamantra_index")
 
     def __init__(self):
         super().__init__()
-        self.df_translation = pd.read_csv(self.TRANSLATION_CSV_PATH, encoding='utf-8')
-        self.df_vedamantra = pd.read_csv(self.VEDAMANTRA_CSV_PATH, encoding='utf-8')
+        self._load_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set yet, i.e. before the datasets are loaded
+        if name in self._LAZY_ATTRIBUTES:
+            self._load()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _load(self):
+        with self._load_lock:
+            if "vedamantra_index" in self.__dict__:
+                return
+            with timed_stage("mantra translations"):
+                self.df_translation = pd.read_csv(self.TRANSLATION_CSV_PATH, encoding='utf-8')
+                # built once at load, so every lookup below is a dict access instead of a full-frame mask
+                self.translation_index = MantraIndex(self.df_translation, id_column='mantra_id')
+            with timed_stage("vedamantra store"):
+                # mantra_json is parsed once (offline or here) and kept as header/summary lists aligned with the rows
+                vedamantra_store = load_store(self.VEDAMANTRA_CSV_PATH, self.VEDAMANTRA_STORE_PATH)
+                self.df_vedamantra = vedamantra_store.frame
+                self.mantra_headers = vedamantra_store.headers
+                self.mantra_summaries = vedamantra_store.summaries
+                self.vedamantra_index = MantraIndex(self.df_vedamantra, id_column='mantra_number')
 
-    @st.cache_data
-    def get_translation(_self, mantraid=None, scripture_name=None, MahatmaName=None, KandahNumber=None,
+    def details_from_header(self, header, scripture_name):
+        '''
+        Walks a parsed mantraHeader down to the mantra details for the given scripture.
+        '''
+        for key in self.DETAILS_PATH.get(normalize_key(scripture_name), self.DEFAULT_DETAILS_PATH):
+            header = header[key]
+        return header
+
+    @staticmethod
+    def _lookup(index, mantraid, scripture_name, **levels):
+        if mantraid is not None:
+            return index.lookup_id(mantraid)
+        return index.lookup(scripture_name, **levels)
+
+    @cached_tool(maxsize=TOOL_CACHE_SIZE, ttl_seconds=TOOL_CACHE_TTL_SECONDS)
+    def get_translation(self, mantraid=None, scripture_name=None, MahatmaName=None, KandahNumber=None,
                         MandalaNumber=None, ArchikahNumber=None, ShuktaNumber=None,
                         AnvayaNumber=None, PrapatakNumber=None, MantraNumber=None,
                         AnuvakNumber=None, AdhyayaNumber=None):
@@ -83,53 +150,24 @@ class MantraToolSpec(BaseToolSpec):
         3. What is the subject of the mantra 1.1.84.1?
         """
         try:
-            if mantraid is None:
-                scripture_name_lower = scripture_name.lower() if scripture_name is not None else False
-                if scripture_name_lower == 'rigveda':
-                    details = _self.df_translation[
-                        (_self.df_translation['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_translation['MandalaNumber'] == MandalaNumber)
-                        & (_self.df_translation['ShuktaNumber'] == int(ShuktaNumber))
-                        & (_self.df_translation['MantraNumber'] == int(MantraNumber))
-                    ].to_dict(orient='records')
-                elif scripture_name_lower == 'atharvaveda':
-                    details = _self.df_translation[
-                        (_self.df_translation['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_translation['KandahNumber'] == KandahNumber)
-                        & (_self.df_translation['ShuktaNumber'] == ShuktaNumber)
-                        & (_self.df_translation['MantraNumber'] == MantraNumber)].to_dict(orient='records')
-                elif scripture_name_lower == 'samaveda':
-                    details = _self.df_translation[
-                        (_self.df_translation['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_translation['ArchikahNumber'] == ArchikahNumber)
-                        & (_self.df_translation['ShuktaNumber'] == ShuktaNumber)
-                        & (_self.df_translation['MantraNumber'] == MantraNumber)].to_dict(orient='records')
-                elif scripture_name_lower == 'krishnayajurveda':
-                    details = _self.df_translation[
-                        (_self.df_translation['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_translation['PrapatakNumber'] == PrapatakNumber)
-                        & (_self.df_translation['AnuvakNumber'] == AnuvakNumber)
-                        & (_self.df_translation['MantraNumber'] == MantraNumber)].to_dict(orient='records')
-                else:
-                    details = _self.df_translation[
-                        (_self.df_translation['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_translation['AdhyayaNumber'] == AdhyayaNumber)
-                        & (_self.df_translation['MantraNumber'] == MantraNumber)
-                    ].to_dict(orient='records')
-            else:
-                details = _self.df_translation[_self.df_translation['mantra_id'] == mantraid].to_dict(orient='records')
+            positions = self._lookup(self.translation_index, mantraid, scripture_name,
+                                     KandahNumber=KandahNumber, MandalaNumber=MandalaNumber,
+                                     ArchikahNumber=ArchikahNumber, ShuktaNumber=ShuktaNumber,
+                                     PrapatakNumber=PrapatakNumber, MantraNumber=MantraNumber,
+                                     AnuvakNumber=AnuvakNumber, AdhyayaNumber=AdhyayaNumber)
+            details = self.df_translation.iloc[positions].to_dict(orient='records')
 
             if MahatmaName is not None:
                 for item in details:
-                    if item['MahatmaName'] == MahatmaName:
+                    if normalize_key(item['MahatmaName']) == normalize_key(MahatmaName):
                         return item
             else:
                 return details
         except Exception as e:
             return json.dumps({"error": f"Failed to get translation. {e}"})
 
-    @st.cache_data
-    def get_vedamantra_details(_self, mantraid=None, scripture_name=None, KandahNumber=None,
+    @cached_tool(maxsize=TOOL_CACHE_SIZE, ttl_seconds=TOOL_CACHE_TTL_SECONDS)
+    def get_vedamantra_details(self, mantraid=None, scripture_name=None, KandahNumber=None,
                                MandalaNumber=None, ArchikahNumber=None, ShuktaNumber=None,
                                AnvayaNumber=None, PrapatakNumber=None, MantraNumber=None,
                                AnuvakNumber=None, AdhyayaNumber=None):
@@ -139,56 +177,24 @@ class MantraToolSpec(BaseToolSpec):
         2. What is the devata of the vedamantra from Rigveda, first mandala, first shukta, and first mantra?
         """
         try:
-            if mantraid is None:
-                scripture_name_lower = scripture_name.lower() if scripture_name is not None else False
-
-                if scripture_name_lower == 'rigveda':
-                    conditions = (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower) & \
-                                  (_self.df_vedamantra['MandalaNumber'] == MandalaNumber) & \
-                                  (_self.df_vedamantra['ShuktaNumber'] == ShuktaNumber) & \
-                                  (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    details = _self.df_vedamantra[conditions]['mantra_json'].values
-                    vedamantra_details = json.loads(details[0])['mantraHeader']['language'][1]['mandala']['shukta']['mantra']
-
-                elif scripture_name_lower == 'atharvaveda':
-                    conditions = (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower) & \
-                                  (_self.df_vedamantra['KandahNumber'] == KandahNumber) & \
-                                  (_self.df_vedamantra['ShuktaNumber'] == ShuktaNumber) & \
-                                  (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    details = _self.df_vedamantra[conditions]['mantra_json'].values
-                    vedamantra_details = json.loads(details[0])['mantraHeader']['language'][1]['kandah']['shukta']['mantra']
-                elif scripture_name_lower == 'samaveda':
-                    conditions = (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower) & \
-                                  (_self.df_vedamantra['ArchikahNumber'] == ArchikahNumber) & \
-                                  (_self.df_vedamantra['ShuktaNumber'] == ShuktaNumber) & \
-                                  (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    details = _self.df_vedamantra[conditions]['mantra_json'].values
-                    vedamantra_details = json.loads(details[0])['mantraHeader']['language'][1]['archikah']
-                elif scripture_name_lower == 'krishnayajurveda':
-                    conditions = (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower) & \
-                                  (_self.df_vedamantra['PrapatakNumber'] == PrapatakNumber) & \
-                                  (_self.df_vedamantra['AnuvakNumber'] == AnuvakNumber) & \
-                                  (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    details = _self.df_vedamantra[conditions]['mantra_json'].values
-                    vedamantra_details = json.loads(details[0])['mantraHeader']['language'][1]['kandah']['prapatak']['anuvak']
-                else:
-                    conditions = (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower) & \
-                                  (_self.df_vedamantra['AdhyayaNumber'] == AdhyayaNumber) & \
-                                  (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    details = _self.df_vedamantra[conditions]['mantra_json'].values
-                    vedamantra_details = json.loads(details[0])['mantraHeader']['language'][1]['adhyaya']['mantra']
+            positions = self._lookup(self.vedamantra_index, mantraid, scripture_name,
+                                     KandahNumber=KandahNumber, MandalaNumber=MandalaNumber,
+                                     ArchikahNumber=ArchikahNumber, ShuktaNumber=ShuktaNumber,
+                                     PrapatakNumber=PrapatakNumber, MantraNumber=MantraNumber,
+                                     AnuvakNumber=AnuvakNumber, AdhyayaNumber=AdhyayaNumber)
+            vedamantra_details = self.mantra_headers[positions[0]]
+            if vedamantra_details is None:
+                raise ValueError("mantraHeader is missing for this mantra.")
 
-            else:
-                # Handle case when mantraid is provided
-                details = _self.df_vedamantra[_self.df_vedamantra['mantra_number'] == mantraid]['mantra_json'].values
-                vedamantra_details = json.loads(details[0])['mantraHeader']['language'][1]
+            if mantraid is None:
+                vedamantra_details = self.details_from_header(vedamantra_details, scripture_name)
 
             return vedamantra_details
         except Exception as e:
             return json.dumps({"error": f"Failed to get vedamantra details. {str(e)}"})
 
-    @st.cache_data
-    def get_vedamantra_summary(_self, mantraid=None, scripture_name=None, KandahNumber=None,
+    @cached_tool(maxsize=TOOL_CACHE_SIZE, ttl_seconds=TOOL_CACHE_TTL_SECONDS)
+    def get_vedamantra_summary(self, mantraid=None, scripture_name=None, KandahNumber=None,
                                MandalaNumber=None, ArchikahNumber=None, ShuktaNumber=None,
                                AnvayaNumber=None, PrapatakNumber=None, MantraNumber=None,
                                AnuvakNumber=None, AdhyayaNumber=None):
@@ -198,52 +204,77 @@ class MantraToolSpec(BaseToolSpec):
         2. What is the anvaya of the vedamantra from Rigveda, first mandala, first shukta, and first mantra?
         '''
         try:
-            if mantraid is None:
-                scripture_name_lower = scripture_name.lower() if scripture_name is not None else False
-                if scripture_name_lower == 'rigveda':
-                    details = _self.df_vedamantra[
-                        (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_vedamantra['MandalaNumber'] == MandalaNumber)
-                        & (_self.df_vedamantra['ShuktaNumber'] == ShuktaNumber)
-                        & (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    ]['mantra_json'].values
-                elif scripture_name_lower == 'atharvaveda':
-                    details = _self.df_vedamantra[
-                        (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_vedamantra['KandahNumber'] == KandahNumber)
-                        & (_self.df_vedamantra['ShuktaNumber'] == ShuktaNumber)
-                        & (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    ]['mantra_json'].values
-                elif scripture_name_lower == 'samaveda':
-                    details = _self.df_vedamantra[
-                        (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_vedamantra['ArchikahNumber'] == ArchikahNumber)
-                        & (_self.df_vedamantra['ShuktaNumber'] == ShuktaNumber)
-                        & (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    ]['mantra_json'].values
-                elif scripture_name_lower == 'krishnayajurveda':
-                    details = _self.df_vedamantra[
-                        (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_vedamantra['PrapatakNumber'] == PrapatakNumber)
-                        & (_self.df_vedamantra['AnuvakNumber'] == AnuvakNumber)
-                        & (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    ]['mantra_json'].values
-                else:
-                    details = _self.df_vedamantra[
-                        (_self.df_vedamantra['scripture_name'].str.lower() == scripture_name_lower)
-                        & (_self.df_vedamantra['AdhyayaNumber'] == AdhyayaNumber)
-                        & (_self.df_vedamantra['MantraNumber'] == str(MantraNumber))
-                    ]['mantra_json'].values
-            else:
-                details = _self.df_vedamantra[_self.df_vedamantra['mantra_number'] == mantraid]['mantra_json'].values
-
-            jsonDict = json.loads(details[0])
-            mantraSummary = jsonDict['mantraSummary']['language']
-            mantraSummary_IAST = jsonDict['mantraSummary']['language'][1]
-            vedamantra_summary = {"Roman-IAST summary of vedamantra": mantraSummary_IAST}
-            for item in mantraSummary:
-                if item['languageName'] == 'English':
-                    vedamantra_summary.update({"English summary of vedamantra": item})
+            positions = self._lookup(self.vedamantra_index, mantraid, scripture_name,
+                                     KandahNumber=KandahNumber, MandalaNumber=MandalaNumber,
+                                     ArchikahNumber=ArchikahNumber, ShuktaNumber=ShuktaNumber,
+                                     PrapatakNumber=PrapatakNumber, MantraNumber=MantraNumber,
+                                     AnuvakNumber=AnuvakNumber, AdhyayaNumber=AdhyayaNumber)
+            vedamantra_summary = self.mantra_summaries[positions[0]]
+            if vedamantra_summary is None:
+                raise ValueError("mantraSummary is missing for this mantra.")
             return vedamantra_summary
         except Exception as e:
             return json.dumps({"error": f"Failed to get vedamantra summary. {e}"})
+
+class VedaStatisticsToolSpec(BaseToolSpec):
+    '''
+    Purpose: Answers count and aggregate questions over the vedamantras (per scripture, mandala, kandah, devata, rishi, swarah, chandah, ...)
+    from a precomputed facet table, without generating code.
+    Columns that can be counted or filtered: 'scripture_name', 'MandalaNumber', 'KandahNumber', 'ArchikahNumber', 'ArchikahName',
+    'PrapatakNumber', 'AnuvakNumber', 'AdhyayaNumber', 'ShuktaNumber', 'ParyayaNumber', 'DevataName', 'RishiName', 'SwarahName', 'ChandaName'
+    Sample query:
+    1. How many mantras are there in RigVeda whose swarah is gāndhāraḥ?
+    2. How many different devata present in rigveda?
+    3. Which Kandah has the maximum number of mantras in KrishnaYajurVeda?
+    '''
+    spec_functions = ["count_mantras", "count_distinct", "most_common"]
+
+    DETAILS_CSV_PATH = "Data/veda_content_details.csv"
+
+    def __init__(self):
+        super().__init__()
+        self._facets = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def facets(self):
+        if self._facets is None:
+            with self._load_lock:
+                if self._facets is None:
+                    with timed_stage("veda statistics"):
+                        self._facets = VedaFacets(pd.read_csv(self.DETAILS_CSV_PATH, encoding='utf-8'))
+        return self._facets
+
+    def count_mantras(self, scripture_name: str = None, filters: dict = None):
+        """
+        Count the mantras of a scripture (or of all scriptures), optionally filtered by column values.
+        filters maps column names to values, e.g. {"SwarahName": "gāndhāraḥ", "MandalaNumber": 1}.
+        1. How many mantras are there in RigVeda? -> count_mantras("RigVeda")
+        2. How many mantras are there in RigVeda whose swarah is gāndhāraḥ? -> count_mantras("RigVeda", {"SwarahName": "gāndhāraḥ"})
+        """
+        try:
+            return {"mantras": self.facets.count(scripture_name, filters)}
+        except Exception as e:
+            return json.dumps({"error": f"Failed to count mantras. {e}"})
+
+    def count_distinct(self, column: str, scripture_name: str = None, filters: dict = None):
+        """
+        Count the different values of a column among the matching mantras.
+        1. How many different devata present in rigveda? -> count_distinct("DevataName", "RigVeda")
+        2. How many shuktas are there in the first mandala of RigVeda? -> count_distinct("ShuktaNumber", "RigVeda", {"MandalaNumber": 1})
+        """
+        try:
+            return {column: self.facets.count_distinct(column, scripture_name, filters)}
+        except Exception as e:
+            return json.dumps({"error": f"Failed to count distinct values. {e}"})
+
+    def most_common(self, column: str, scripture_name: str = None, filters: dict = None, top_n: int = 1):
+        """
+        The values of a column with the most matching mantras, with their mantra counts.
+        1. Which Kandah has the maximum number of mantras in KrishnaYajurVeda? -> most_common("KandahNumber", "KrishnaYajurVeda")
+        2. Which are the five most frequent devata in AtharvaVeda? -> most_common("DevataName", "AtharvaVeda", top_n=5)
+        """
+        try:
+            return self.facets.most_common(column, scripture_name, filters, top_n)
+        except Exception as e:
+            return json.dumps({"error": f"Failed to find the most common values. {e}"})
@@ -0,0 +1,230 @@
+'''
+Local, file-backed vector store: an alternative to Pinecone for offline runs, tests and benchmarks.
+
+Dense embeddings live in a memory-mapped NumPy array; sparse term counts in an inverted index.
+Hybrid queries score documents as alpha * dense + (1 - alpha) * sparse, the same convex combination
+PineconeVectorStore sends to a dotproduct Pinecone index, with token counts as the sparse vectors.
+Build the index from the project's Data files with
+
+    python src/LocalVectorStore.py --output Data/local_index
+'''
+import argparse
+import json
+import os
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+from llama_index.core.schema import MetadataMode, NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import VectorStoreQueryMode, VectorStoreQueryResult
+
+LOCAL_INDEX_PATH = "Data/local_index"
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class SparseIndex:
+    '''
+    Inverted index of per-document term counts, stored term-major (like a CSC matrix).
+    '''
+
+    def __init__(self, vocab, indptr, doc_ids, weights):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+
+    @classmethod
+    def from_texts(cls, texts):
+        postings = defaultdict(list)
+        for doc_id, text in enumerate(texts):
+            for term, count in Counter(tokenize(text)).items():
+                postings[term].append((doc_id, count))
+
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(postings[term]) for term in terms])
+        doc_ids = np.fromiter((doc_id for term in terms for doc_id, _ in postings[term]),
+                              dtype=np.int32, count=indptr[-1])
+        weights = np.fromiter((count for term in terms for _, count in postings[term]),
+                              dtype=np.float32, count=indptr[-1])
+        return cls({term: i for i, term in enumerate(terms)}, indptr, doc_ids, weights)
+
+    def scores(self, text, size):
+        scores = np.zeros(size, dtype=np.float32)
+        for term, count in Counter(tokenize(text or "")).items():
+            t = self.vocab.get(term)
+            if t is not None:
+                start, end = self.indptr[t], self.indptr[t + 1]
+                # a term lists each document at most once, so fancy-index addition is safe
+                scores[self.doc_ids[start:end]] += count * self.weights[start:end]
+        return scores
+
+
+class LocalVectorStore:
+    '''
+    Vector store over a persisted directory of embeddings.npy, nodes.jsonl and sparse.npz.
+    Implements the llama_index VectorStore protocol, so it plugs into VectorStoreIndex.from_vector_store
+    in place of PineconeVectorStore.
+    '''
+    stores_text = True
+    is_embedding_query = True
+    flat_metadata = False
+
+    def __init__(self, nodes=None, embeddings=None, sparse=None):
+        self._nodes = nodes if nodes is not None else []
+        self._embeddings = embeddings
+        self._sparse = sparse
+
+    @property
+    def client(self):
+        return None
+
+    @property
+    def nodes(self):
+        return self._nodes
+
+    @classmethod
+    def load(cls, persist_dir=LOCAL_INDEX_PATH):
+        embeddings = np.load(os.path.join(persist_dir, "embeddings.npy"), mmap_mode='r')
+        with open(os.path.join(persist_dir, "nodes.jsonl"), 'r', encoding='utf-8') as f:
+            nodes = [json.loads(line) for line in f]
+        with np.load(os.path.join(persist_dir, "sparse.npz")) as sparse:
+            vocab = {term: i for i, term in enumerate(sparse['terms'])}
+            sparse_index = SparseIndex(vocab, sparse['indptr'], sparse['doc_ids'], sparse['weights'])
+        return cls(nodes, embeddings, sparse_index)
+
+    def persist(self, persist_path=LOCAL_INDEX_PATH, fs=None):
+        os.makedirs(persist_path, exist_ok=True)
+        np.save(os.path.join(persist_path, "embeddings.npy"), np.asarray(self._embeddings, dtype=np.float32))
+        with open(os.path.join(persist_path, "nodes.jsonl"), 'w', encoding='utf-8') as f:
+            for node in self._nodes:
+                f.write(json.dumps(node, ensure_ascii=False) + "\n")
+        sparse = self._sparse_index()
+        terms = np.array(sorted(sparse.vocab, key=sparse.vocab.get), dtype=str)
+        np.savez(os.path.join(persist_path, "sparse.npz"), terms=terms, indptr=sparse.indptr,
+                 doc_ids=sparse.doc_ids, weights=sparse.weights)
+
+    def add(self, nodes, **add_kwargs):
+        if not nodes:
+            return []
+        for node in nodes:
+            self._nodes.append({"id": node.node_id,
+                                "text": node.get_content(metadata_mode=MetadataMode.NONE),
+                                "metadata": node.metadata,
+                                "ref_doc_id": node.ref_doc_id})
+        rows = _unit_rows(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        self._embeddings = rows if self._embeddings is None else np.vstack([self._embeddings, rows])
+        self._sparse = None
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id, **delete_kwargs):
+        keep = [i for i, node in enumerate(self._nodes) if node["ref_doc_id"] != ref_doc_id]
+        self._nodes = [self._nodes[i] for i in keep]
+        self._embeddings = np.asarray(self._embeddings)[keep]
+        self._sparse = None
+
+    def query(self, query, **kwargs):
+        if query.filters is not None:
+            raise NotImplementedError("Metadata filters are not supported by LocalVectorStore.")
+        if not self._nodes:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        query_embedding = _unit_rows(np.asarray(query.query_embedding, dtype=np.float32))
+        scores = self._embeddings @ query_embedding
+        if query.mode == VectorStoreQueryMode.HYBRID:
+            alpha = 0.5 if query.alpha is None else query.alpha
+            scores = alpha * scores + (1 - alpha) * self._sparse_index().scores(query.query_str, len(self._nodes))
+
+        top_k = min(query.similarity_top_k, len(self._nodes))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        nodes = [self._to_node(self._nodes[i]) for i in top]
+        return VectorStoreQueryResult(nodes=nodes, similarities=[float(scores[i]) for i in top],
+                                      ids=[node.node_id for node in nodes])
+
+    def _sparse_index(self):
+        if self._sparse is None:
+            self._sparse = SparseIndex.from_texts([node["text"] for node in self._nodes])
+        return self._sparse
+
+    @staticmethod
+    def _to_node(record):
+        relationships = {}
+        if record.get("ref_doc_id"):
+            relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=record["ref_doc_id"])
+        return TextNode(id_=record["id"], text=record["text"], metadata=record["metadata"],
+                        relationships=relationships)
+
+
+def load_documents(data_dir="Data"):
+    '''
+    Builds the documents to index from the scripture descriptions and the per-mantra details.
+    '''
+    from llama_index.core import Document
+    from Startup import detect_encoding
+
+    documents = []
+    descriptions_path = os.path.join(data_dir, "scripture_descriptions.csv")
+    if os.path.exists(descriptions_path):
+        df = pd.read_csv(descriptions_path, encoding=detect_encoding(descriptions_path))
+        for row in df.itertuples(index=False):
+            if not isinstance(row.description, str):
+                continue
+            levels = [str(level) for level in (row.level_1, row.level_2, row.level_3) if pd.notna(level)]
+            documents.append(Document(
+                text=f"{row.name} ({row.type}): {row.description}",
+                metadata={"scripture_name": row.scripture_name, "level": ".".join(levels)},
+            ))
+
+    details_path = os.path.join(data_dir, "veda_content_details.csv")
+    if os.path.exists(details_path):
+        df = pd.read_csv(details_path, encoding='utf-8')
+        fields = [("vedamantra", "vedamantra"), ("padapatha", "padapatha"), ("DevataName", "devata"),
+                  ("RishiName", "rishi"), ("ChandaName", "chandah"), ("SwarahName", "swarah")]
+        for record in df.to_dict(orient='records'):
+            lines = [f"{record['scripture_name']} mantra {record.get('mantra_id')}"]
+            lines += [f"{label}: {record[column]}" for column, label in fields
+                      if column in record and pd.notna(record[column])]
+            documents.append(Document(
+                text="\n".join(lines),
+                metadata={"scripture_name": record['scripture_name'], "mantra_id": str(record.get('mantra_id'))},
+            ))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local vector index from the Data files.")
+    parser.add_argument('--data-dir', default="Data")
+    parser.add_argument('--output', default=LOCAL_INDEX_PATH)
+    parser.add_argument('--model', default="BAAI/bge-large-en-v1.5")
+    args = parser.parse_args()
+
+    from llama_index.core import Settings, StorageContext, VectorStoreIndex
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    Settings.embed_model = HuggingFaceEmbedding(model_name=args.model, embed_batch_size=8)
+    Settings.chunk_size = 512
+    Settings.chunk_overlap = 50
+
+    vector_store = LocalVectorStore()
+    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    VectorStoreIndex.from_documents(load_documents(args.data_dir), storage_context=storage_context,
+                                    show_progress=True)
+    vector_store.persist(args.output)
+    print(f"Wrote {len(vector_store.nodes)} nodes to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
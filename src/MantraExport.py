@@ -0,0 +1,217 @@
+'''
+Bulk export of mantras: the details, summary and translations of every mantra in a range of
+addresses (e.g. all of RigVeda mandala 1, shuktas 1-10) or in a list of mantra ids, streamed as JSON
+Lines or Parquet so a large export is never held in memory at once.
+
+    python src/MantraExport.py --scripture RigVeda --level MandalaNumber=1 --level ShuktaNumber=1-10 > mandala1.jsonl
+    python src/MantraExport.py --scripture AtharvaVeda --format parquet --output atharvaveda.parquet
+    python src/MantraExport.py --ids 1.1.1.1 1.1.1.2 2.1.1.1
+
+Each record has the mantra_id, scripture_name, the scripture's address levels, the mantra details
+(vedamantra, padapatha, devata, rishi, ...), the summary and the list of translations. In Parquet the
+address levels are float columns (as in the source CSVs, where missing levels make them float) and
+details, summary and translations are JSON strings.
+'''
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from FunctionTools import MantraToolSpec
+from MantraIndex import ADDRESS_COLUMNS, DEFAULT_ADDRESS_COLUMNS, address_columns, normalize_key
+
+EXPORT_CHUNK_SIZE = 1000
+
+# address level columns of the Parquet schema, across all scriptures
+LEVEL_COLUMNS = tuple(dict.fromkeys(column for columns in (*ADDRESS_COLUMNS.values(), DEFAULT_ADDRESS_COLUMNS)
+                                    for column in columns))
+JSON_COLUMNS = ("details", "summary", "translations")
+
+
+def _records(frame):
+    # to_dict keeps NaN for missing cells, which is not valid JSON
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def _level(value):
+    # whole numbers as ints in JSON; the Parquet columns are float64, which holds both. Values that
+    # are not numbers are missing, as in MantraIndex.select (pd.to_numeric with errors='coerce')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number):
+        return None
+    return int(number) if number.is_integer() else number
+
+
+class MantraExporter:
+    '''
+    Resolves ranges or lists of mantras against the datasets loaded by MantraToolSpec and turns them
+    into export records, a chunk at a time.
+    '''
+
+    def __init__(self, spec=None):
+        # pass the agent's MantraToolSpec to reuse its loaded datasets
+        self.spec = spec if spec is not None else MantraToolSpec()
+
+    def select(self, scripture_name=None, **selectors):
+        '''
+        Row positions of the mantras matching the level selectors, in address order, e.g.
+        select('RigVeda', MandalaNumber=1, ShuktaNumber='1-10'). See MantraIndex.select.
+        '''
+        return self.spec.vedamantra_index.select(scripture_name, **selectors)
+
+    def select_ids(self, mantra_ids):
+        '''
+        Row positions of the given mantra ids, in the order given; unknown ids are skipped.
+        '''
+        index = self.spec.vedamantra_index
+        positions = [position for mantra_id in mantra_ids for position in index.lookup_id(mantra_id)]
+        return np.array(positions, dtype=int)
+
+    def iter_records(self, positions, chunk_size=EXPORT_CHUNK_SIZE):
+        '''
+        Yields one export record per row position.
+        '''
+        spec = self.spec
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start:start + chunk_size]
+            rows = _records(spec.df_vedamantra.iloc[chunk])
+            translations = self._translations(row['mantra_number'] for row in rows)
+            for position, row in zip(chunk, rows):
+                scripture_name = row['scripture_name']
+                record = {"mantra_id": row['mantra_number'], "scripture_name": scripture_name}
+                for column in address_columns(normalize_key(scripture_name)):
+                    record[column] = _level(row.get(column))
+                record["details"] = self._details(spec.mantra_headers[position], scripture_name)
+                record["summary"] = spec.mantra_summaries[position]
+                record["translations"] = translations.get(normalize_key(row['mantra_number']), [])
+                yield record
+
+    def _details(self, header, scripture_name):
+        if header is None:
+            return None
+        try:
+            return self.spec.details_from_header(header, scripture_name)
+        except (KeyError, TypeError):
+            # headers that do not follow the scripture's layout are exported whole
+            return header
+
+    def _translations(self, mantra_ids):
+        '''
+        Translations of a chunk of mantras, by normalized mantra id, taken from the frame in one pass.
+        '''
+        index = self.spec.translation_index
+        positions = {}
+        for mantra_id in mantra_ids:
+            key = normalize_key(mantra_id)
+            if key not in positions:
+                positions[key] = index.lookup_id(key)
+        flat = [position for group in positions.values() for position in group]
+        rows = iter(_records(self.spec.df_translation.iloc[flat]))
+        return {key: [next(rows) for _ in group] for key, group in positions.items()}
+
+
+def iter_jsonl(records):
+    '''
+    Yields the records as JSON Lines.
+    '''
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+def write_jsonl(records, fp):
+    '''
+    Writes the records to a text file object, one JSON object per line. Returns the record count.
+    '''
+    count = 0
+    for count, line in enumerate(iter_jsonl(records), 1):
+        fp.write(line)
+    return count
+
+
+def write_parquet(records, path, batch_size=EXPORT_CHUNK_SIZE):
+    '''
+    Writes the records to a Parquet file, one row group per `batch_size` records. Returns the record count.
+    '''
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([("mantra_id", pa.string()), ("scripture_name", pa.string())]
+                       + [(column, pa.float64()) for column in LEVEL_COLUMNS]
+                       + [(column, pa.string()) for column in JSON_COLUMNS])
+
+    def to_batch(batch):
+        columns = {"mantra_id": [str(record["mantra_id"]) for record in batch],
+                   "scripture_name": [record["scripture_name"] for record in batch]}
+        for column in LEVEL_COLUMNS:
+            columns[column] = [record.get(column) for record in batch]
+        for column in JSON_COLUMNS:
+            columns[column] = [json.dumps(record[column], ensure_ascii=False, default=str) for record in batch]
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for record in records:
+            batch.append(record)
+            if len(batch) == batch_size:
+                writer.write_table(to_batch(batch))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            writer.write_table(to_batch(batch))
+            count += len(batch)
+    return count
+
+
+def parse_levels(levels):
+    '''
+    Parses ["MandalaNumber=1", "ShuktaNumber=1-10"] into selectors for MantraIndex.select.
+    '''
+    selectors = {}
+    for level in levels:
+        column, separator, selector = level.partition('=')
+        if not separator:
+            raise ValueError(f"Invalid level {level!r}. Expected Column=selector, e.g. ShuktaNumber=1-10.")
+        selectors[column.strip()] = selector.strip()
+    return selectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scripture', help="scripture name, e.g. RigVeda")
+    parser.add_argument('--level', action='append', default=[],
+                        help="address level selector such as MandalaNumber=1 or ShuktaNumber=1-10 (repeatable)")
+    parser.add_argument('--ids', nargs='+', help="export these mantra ids instead of a range")
+    parser.add_argument('--format', choices=('jsonl', 'parquet'), default='jsonl')
+    parser.add_argument('--output', help="output file (default: standard output, JSON Lines only)")
+    args = parser.parse_args()
+
+    exporter = MantraExporter()
+    if args.ids:
+        positions = exporter.select_ids(args.ids)
+    else:
+        positions = exporter.select(args.scripture, **parse_levels(args.level))
+    records = exporter.iter_records(positions)
+
+    if args.format == 'parquet':
+        if not args.output:
+            parser.error("--output is required for Parquet")
+        count = write_parquet(records, args.output)
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            count = write_jsonl(records, f)
+    else:
+        count = write_jsonl(records, sys.stdout)
+    print(f"Exported {count} mantras", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+# Columns that address a single mantra within each scripture. Scriptures not
+# listed here (e.g. ShuklaYajurVeda) are addressed by adhyaya and mantra.
+ADDRESS_COLUMNS = {
+    'rigveda': ('MandalaNumber', 'ShuktaNumber', 'MantraNumber'),
+    'atharvaveda': ('KandahNumber', 'ShuktaNumber', 'MantraNumber'),
+    'samaveda': ('ArchikahNumber', 'ShuktaNumber', 'MantraNumber'),
+    'krishnayajurveda': ('PrapatakNumber', 'AnuvakNumber', 'MantraNumber'),
+}
+DEFAULT_ADDRESS_COLUMNS = ('AdhyayaNumber', 'MantraNumber')
+
+_INTEGRAL = re.compile(r'\d+(\.0*)?')
+
+
+def address_columns(scripture_name):
+    '''
+    Returns the address columns used for the given (lower-cased) scripture name.
+    '''
+    return ADDRESS_COLUMNS.get(scripture_name, DEFAULT_ADDRESS_COLUMNS)
+
+
+def normalize_key(value):
+    '''
+    Normalizes an address component so that 1, 1.0, '1' and ' 01 ' all map to the same key.
+    Missing values (None/NaN) normalize to None.
+    '''
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        return str(int(value)) if value.is_integer() else str(value)
+    text = str(value).strip().lower()
+    if _INTEGRAL.fullmatch(text):
+        return str(int(float(text)))
+    return text
+
+
+class MantraIndex:
+    '''
+    Point-lookup index over a mantra dataframe.
+    Maps (scripture, level..., mantra) addresses and mantra ids to row positions, so tool calls
+    resolve with a dict lookup instead of a boolean mask over the whole frame.
+    '''
+
+    def __init__(self, df, id_column):
+        self._addresses = {}
+        self._ids = {}
+        self._size = len(df)
+
+        # Normalize each address column once, up front, rather than per row
+        columns = {column for columns in ADDRESS_COLUMNS.values() for column in columns}
+        columns.update(DEFAULT_ADDRESS_COLUMNS)
+        normalized = {column: [normalize_key(value) for value in df[column].values] if column in df
+                      else [None] * len(df)
+                      for column in columns}
+
+        # numeric copies of the same columns for range selection
+        self._levels = {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+                        for column in columns if column in df}
+        self._scriptures = np.array([normalize_key(value) for value in df['scripture_name'].values], dtype=object)
+
+        scriptures = df['scripture_name'].str.lower().values
+        for position, scripture in enumerate(scriptures):
+            if not isinstance(scripture, str):
+                continue
+            key = (scripture,) + tuple(normalized[column][position] for column in address_columns(scripture))
+            self._addresses.setdefault(key, []).append(position)
+
+        for position, mantra_id in enumerate(df[id_column].values):
+            self._ids.setdefault(normalize_key(mantra_id), []).append(position)
+
+    def lookup(self, scripture_name, **levels):
+        '''
+        Returns the row positions for the mantra address, e.g.
+        lookup('RigVeda', MandalaNumber=1, ShuktaNumber=1, MantraNumber=1).
+        '''
+        if scripture_name is None:
+            return []
+        scripture = normalize_key(scripture_name)
+        key = (scripture,) + tuple(normalize_key(levels.get(column)) for column in address_columns(scripture))
+        return self._addresses.get(key, [])
+
+    def lookup_id(self, mantraid):
+        '''
+        Returns the row positions for the given mantra id.
+        '''
+        return self._ids.get(normalize_key(mantraid), [])
+
+    def select(self, scripture_name=None, **selectors):
+        '''
+        Returns the row positions of every mantra matching all the selectors, in address order, in one
+        vectorized pass, e.g. select('RigVeda', MandalaNumber=1, ShuktaNumber='1-10').
+        A selector is a number, a range/list string such as '1-10' or '1,3,5-7', or a list of those;
+        levels without a selector match everything.
+        '''
+        mask = np.ones(self._size, dtype=bool)
+        if scripture_name is not None:
+            mask &= self._scriptures == normalize_key(scripture_name)
+        for column, selector in selectors.items():
+            if selector is None:
+                continue
+            if column not in self._levels:
+                raise ValueError(f"Unknown address column {column!r}. Available columns: {sorted(self._levels)}")
+            values = self._levels[column]
+            matched = np.zeros(self._size, dtype=bool)
+            for low, high in parse_selector(selector):
+                matched |= (values >= low) & (values <= high)
+            mask &= matched
+
+        positions = np.flatnonzero(mask)
+        if scripture_name is not None and len(positions):
+            # lexsort sorts by the last key first, and NaN levels sort last
+            keys = [self._levels[column][positions] for column in reversed(address_columns(normalize_key(scripture_name)))
+                    if column in self._levels]
+            if keys:
+                positions = positions[np.lexsort(keys)]
+        return positions
+
+
+def parse_selector(selector):
+    '''
+    Parses a level selector (1, '3', '1-10', '1,3,5-7' or a list of those) into inclusive (low, high) ranges.
+    '''
+    if isinstance(selector, (list, tuple, set)):
+        return [interval for item in selector for interval in parse_selector(item)]
+    if isinstance(selector, (int, float, np.integer, np.floating)):
+        return [(float(selector), float(selector))]
+    intervals = []
+    for part in str(selector).split(','):
+        low, _, high = part.strip().partition('-')
+        try:
+            intervals.append((float(low), float(high or low)))
+        except ValueError:
+            raise ValueError(f"Invalid selector {selector!r}. Expected e.g. 1, '1-10' or '1,3,5-7'.") from None
+    return intervals
@@ -0,0 +1,108 @@
+'''
+Compact, pre-parsed store for Data/veda_content_modified_v3.csv.
+
+The `mantra_json` column holds a large JSON blob per mantra of which the tools only ever read
+`mantraHeader.language[1]` and `mantraSummary.language`. The conversion below parses every blob
+once, keeps only those two fields and drops the raw column, so tool calls return already-parsed
+objects. Build the store offline with
+
+    python src/MantraStore.py
+
+and MantraToolSpec picks it up on load; without it the same conversion runs in memory at load time.
+'''
+import argparse
+import json
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+VEDAMANTRA_CSV_PATH = "Data/veda_content_modified_v3.csv"
+VEDAMANTRA_STORE_PATH = "Data/veda_content_store.pkl"
+
+
+def _interned_object(pairs):
+    # Every mantra repeats the same keys; interning them lets all rows share one copy
+    return {sys.intern(key): value for key, value in pairs}
+
+
+def extract_fields(mantra_json):
+    '''
+    Returns (header, summary) for a single mantra_json blob, with None for any part that is missing.
+    '''
+    try:
+        json_dict = json.loads(mantra_json, object_pairs_hook=_interned_object)
+    except (TypeError, ValueError):
+        return None, None
+
+    try:
+        header = json_dict['mantraHeader']['language'][1]
+    except (KeyError, IndexError, TypeError):
+        header = None
+
+    try:
+        mantraSummary = json_dict['mantraSummary']['language']
+        summary = {"Roman-IAST summary of vedamantra": mantraSummary[1]}
+        for item in mantraSummary:
+            if item['languageName'] == 'English':
+                summary.update({"English summary of vedamantra": item})
+    except (KeyError, IndexError, TypeError):
+        summary = None
+
+    return header, summary
+
+
+class MantraStore:
+    '''
+    The vedamantra frame without its `mantra_json` column, plus the parsed header and summary of
+    every row, aligned by row position.
+    '''
+
+    def __init__(self, frame, headers, summaries):
+        self.frame = frame
+        self.headers = headers
+        self.summaries = summaries
+
+    @classmethod
+    def from_csv(cls, csv_path=VEDAMANTRA_CSV_PATH):
+        frame = pd.read_csv(csv_path, encoding='utf-8')
+        fields = [extract_fields(mantra_json) for mantra_json in frame.pop('mantra_json').values]
+        headers = [header for header, _ in fields]
+        summaries = [summary for _, summary in fields]
+        return cls(frame, headers, summaries)
+
+    def save(self, store_path=VEDAMANTRA_STORE_PATH):
+        with open(store_path, 'wb') as f:
+            pickle.dump((self.frame, self.headers, self.summaries), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, store_path=VEDAMANTRA_STORE_PATH):
+        with open(store_path, 'rb') as f:
+            frame, headers, summaries = pickle.load(f)
+        return cls(frame, headers, summaries)
+
+
+def load_store(csv_path=VEDAMANTRA_CSV_PATH, store_path=VEDAMANTRA_STORE_PATH):
+    '''
+    Loads the prebuilt store if it is at least as new as the CSV, otherwise converts the CSV in memory.
+    '''
+    if os.path.exists(store_path) and \
+            (not os.path.exists(csv_path) or os.path.getmtime(store_path) >= os.path.getmtime(csv_path)):
+        return MantraStore.load(store_path)
+    return MantraStore.from_csv(csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pre-parsed vedamantra store.")
+    parser.add_argument('--csv', default=VEDAMANTRA_CSV_PATH)
+    parser.add_argument('--output', default=VEDAMANTRA_STORE_PATH)
+    args = parser.parse_args()
+
+    store = MantraStore.from_csv(args.csv)
+    store.save(args.output)
+    print(f"Wrote {len(store.headers)} mantras to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
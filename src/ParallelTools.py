@@ -0,0 +1,55 @@
+import contextlib
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from llama_index.core.tools.tool_spec.base import BaseToolSpec
+
+
+class ParallelToolSpec(BaseToolSpec):
+    '''
+    Purpose: Planner/executor for independent tool calls. The agent plans several calls in one step and they run
+    concurrently on a thread pool, so a multi-part question takes about as long as its slowest call instead of the sum.
+    Returns: A list with one observation per call, in the order of the calls.
+    Sample query:
+    1. Compare the devata and the English summary of RigVeda 1.1.1 and AtharvaVeda 1.1.1.
+    '''
+    spec_functions = ["run_tools_in_parallel"]
+
+    def __init__(self, tools, max_workers=8, tracer=None):
+        super().__init__()
+        self._tools = {tool.metadata.name: tool for tool in tools}
+        self._tracer = tracer
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="parallel-tool")
+
+    def run_tools_in_parallel(self, calls: list):
+        """
+        Run several independent tool calls at the same time and return all their observations.
+        Use it when a question needs more than one tool call and no call depends on the result of another.
+        calls is a list of {"tool": <tool name>, "input": {<arguments of that tool>}}, e.g.
+        [{"tool": "get_vedamantra_details", "input": {"scripture_name": "RigVeda", "MandalaNumber": 1, "ShuktaNumber": 1, "MantraNumber": 1}},
+         {"tool": "get_vedamantra_details", "input": {"scripture_name": "AtharvaVeda", "KandahNumber": 1, "ShuktaNumber": 1, "MantraNumber": 1}},
+         {"tool": "vector_engine", "input": {"input": "What is the meaning of devata?"}}]
+        """
+        try:
+            # each call runs in a copy of the caller's context, so tracing attributes it to the current turn
+            futures = [self._executor.submit(contextvars.copy_context().run, self._call, call) for call in calls]
+            return [future.result() for future in futures]
+        except Exception as e:
+            return json.dumps({"error": f"Failed to run the tool calls. {e}"})
+
+    def _call(self, call):
+        if not isinstance(call, dict) or not isinstance(call.get("input") or {}, dict):
+            return {"error": "each call must be {'tool': <tool name>, 'input': {<arguments>}}", "call": call}
+        tool_name = call.get("tool")
+        tool_input = call.get("input") or {}
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            return {"tool": tool_name, "error": f"Unknown tool. Available tools: {list(self._tools)}"}
+        # tool.call raises no FUNCTION_CALL event, so the span is recorded here
+        span = self._tracer.span(f"tool:{tool_name}") if self._tracer is not None else contextlib.nullcontext()
+        try:
+            with span:
+                return {"tool": tool_name, "input": tool_input, "output": tool.call(**tool_input).content}
+        except Exception as e:
+            return {"tool": tool_name, "input": tool_input, "error": str(e)}
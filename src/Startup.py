@@ -0,0 +1,94 @@
+'''
+Startup helpers: per-stage timings, a cached encoding detector and a lazily built query engine.
+Streamlit re-executes app.py on every interaction, so anything expensive should be created on
+first use behind st.cache_resource and timed with `timed_stage`.
+'''
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import chardet
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+
+logger = logging.getLogger(__name__)
+
+ENCODING_CACHE_PATH = "Data/.encoding_cache.json"
+
+# stage name -> seconds, for the lifetime of the process
+STARTUP_TIMINGS = {}
+
+
+@contextmanager
+def timed_stage(name):
+    '''
+    Records the wall time of the enclosed block under `name` in STARTUP_TIMINGS.
+    '''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STARTUP_TIMINGS[name] = elapsed
+        logger.info("startup stage %s took %.3fs", name, elapsed)
+
+
+def detect_encoding(path, cache_path=ENCODING_CACHE_PATH):
+    '''
+    Returns the encoding chardet detects for `path`, caching the result on disk keyed on the
+    file's size and modification time so the full-file scan only happens when the file changes.
+    '''
+    stat = os.stat(path)
+    fingerprint = [stat.st_size, stat.st_mtime]
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(path)
+    if entry is not None and entry.get('fingerprint') == fingerprint:
+        return entry['encoding']
+
+    with open(path, 'rb') as f:
+        encoding = chardet.detect(f.read())['encoding']
+
+    cache[path] = {'fingerprint': fingerprint, 'encoding': encoding}
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except OSError:
+        logger.warning("Could not write encoding cache to %s", cache_path)
+    return encoding
+
+
+class LazyQueryEngine(BaseQueryEngine):
+    '''
+    Query engine proxy that calls `factory` to build the real engine on the first query, so
+    tools can be handed to the agent without loading their models or datasets up front.
+    '''
+
+    def __init__(self, factory):
+        super().__init__(callback_manager=None)
+        self._factory = factory
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._factory()
+        return self._engine
+
+    def _get_prompt_modules(self):
+        return {}
+
+    def _query(self, query_bundle):
+        return self.engine.query(query_bundle)
+
+    async def _aquery(self, query_bundle):
+        return await self.engine.aquery(query_bundle)
@@ -0,0 +1,118 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from MantraIndex import normalize_key
+
+# Every cache created by `cached_tool`, by qualified function name, for stats and clearing
+TOOL_CACHES = {}
+
+
+def normalize_argument(value):
+    '''
+    Normalizes a tool argument for the cache key: scalars as in normalize_key (so 'RigVeda' and
+    'rigveda', or '1', 1 and 1.0, share an entry), anything else by its JSON form.
+    '''
+    if value is None or isinstance(value, (str, int, float)):
+        return normalize_key(value)
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def is_error_result(result):
+    '''
+    True for the error payloads the tools return (json.dumps({"error": ...})) instead of raising.
+    '''
+    return isinstance(result, str) and result.startswith('{"error"')
+
+
+class ToolCache:
+    '''
+    Bounded memoization for tool functions, independent of Streamlit.
+    Entries expire after `ttl_seconds` (None: never); beyond `maxsize` the least recently used entry
+    is evicted.
+    '''
+
+    def __init__(self, maxsize=4096, ttl_seconds=None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (result, created), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        '''
+        Returns (True, result) on a hit and (False, None) on a miss.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None \
+                    and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (result, time.monotonic())
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cached_tool(maxsize=4096, ttl_seconds=None, cacheable=lambda result: not is_error_result(result)):
+    '''
+    Memoizes a tool method on its normalized arguments. The instance (first parameter) is not part
+    of the key, so all instances share one cache, which is available as `method.cache`. Results are
+    shared between callers and must not be mutated. Only results for which `cacheable` is true are
+    stored; by default error payloads are not, so a failure (e.g. a data file that is missing while
+    it is rebuilt) is retried on the next call rather than served until it expires.
+    '''
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        cache = ToolCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(normalize_argument(value) for value in list(bound.arguments.values())[1:])
+            hit, result = cache.get(key)
+            if not hit:
+                result = fn(self, *args, **kwargs)
+                if cacheable(result):
+                    cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        TOOL_CACHES[fn.__qualname__] = cache
+        return wrapper
+    return decorator
+
+
+def tool_cache_stats():
+    return {name: cache.stats() for name, cache in TOOL_CACHES.items()}
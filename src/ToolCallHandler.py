@@ -0,0 +1,39 @@
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from llama_index.core.callbacks.schema import CBEventType, EventPayload
+
+
+class ToolCallStreamHandler(BaseCallbackHandler):
+    '''
+    Callback handler that forwards the agent's tool calls to `on_tool_event` as they happen,
+    so the UI can show them while the ReAct loop is still running.
+    Each event is a dict: {"type": "tool_call" | "tool_output", "tool": <tool name>, "content": <str>}.
+    '''
+
+    def __init__(self, on_tool_event=None):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self.on_tool_event = on_tool_event
+        self._tool_names = {}
+
+    def on_event_start(self, event_type, payload=None, event_id="", parent_id="", **kwargs):
+        if event_type == CBEventType.FUNCTION_CALL and payload is not None:
+            tool_name = payload[EventPayload.TOOL].name
+            self._tool_names[event_id] = tool_name
+            self._emit({"type": "tool_call", "tool": tool_name,
+                        "content": str(payload.get(EventPayload.FUNCTION_CALL))})
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id="", **kwargs):
+        if event_type == CBEventType.FUNCTION_CALL:
+            tool_name = self._tool_names.pop(event_id, None)
+            output = payload.get(EventPayload.FUNCTION_OUTPUT) if payload is not None else None
+            self._emit({"type": "tool_output", "tool": tool_name, "content": str(output)})
+
+    def start_trace(self, trace_id=None):
+        pass
+
+    def end_trace(self, trace_id=None, trace_map=None):
+        pass
+
+    def _emit(self, event):
+        if self.on_tool_event is not None:
+            self.on_tool_event(event)
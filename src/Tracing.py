@@ -0,0 +1,246 @@
+'''
+Per-turn latency tracing.
+
+LatencyTracer is a llama_index callback handler. Wrap each chat turn in `tracer.turn(...)` and every
+callback event raised while it runs (in this thread or in contexts copied from it) is recorded as a span
+of one of these stages:
+    agent_llm         an LLM call made by the agent itself (one ReAct step)
+    tool:<name>       a tool call, end to end
+    tool_llm          an LLM call made inside a tool (e.g. pandas code generation, answer synthesis)
+    embedding         query/document embedding
+    vector_query      a retrieval against the vector store (Pinecone or local)
+    pandas_execution  evaluating the generated pandas code (see `traced_span`)
+with LLM and embedding token counts. Finished turns are logged as JSON on the `veda_bot.trace` logger
+(see `configure_trace_logging`), kept for the debug panel and aggregated into Prometheus-style metrics
+(`render_metrics`).
+'''
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from llama_index.core.callbacks.schema import CBEventType, EventPayload
+from llama_index.core.callbacks.token_counting import get_llm_token_counts
+from llama_index.core.utilities.token_counting import TokenCounter
+
+logger = logging.getLogger("veda_bot.trace")
+
+
+def configure_trace_logging(level=logging.INFO):
+    '''
+    Sends the per-turn JSON records to stderr, one per line. Safe to call more than once.
+    '''
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    # the records are complete as they are; do not repeat them through the root logger
+    logger.propagate = False
+
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+_current_tool = contextvars.ContextVar("current_tool", default=None)
+_current_llm = contextvars.ContextVar("current_llm", default=None)
+
+
+class TurnTrace:
+    '''
+    The spans recorded for one chat turn.
+    '''
+
+    def __init__(self, session_id, query):
+        self.turn_id = str(uuid.uuid4())
+        self.session_id = session_id
+        self.query = query
+        self.started = time.time()
+        self.total_seconds = None
+        self.spans = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, stage, seconds, prompt_tokens=0, completion_tokens=0):
+        with self._lock:
+            self.spans.append({"stage": stage, "seconds": seconds,
+                               "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens})
+
+    def summary(self):
+        '''
+        Returns the spans aggregated by stage.
+        '''
+        stages = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        with self._lock:
+            for span in self.spans:
+                stage = stages[span["stage"]]
+                stage["calls"] += 1
+                stage["seconds"] += span["seconds"]
+                stage["prompt_tokens"] += span["prompt_tokens"]
+                stage["completion_tokens"] += span["completion_tokens"]
+        return {"turn_id": self.turn_id, "session_id": self.session_id, "query": self.query,
+                "started": self.started, "total_seconds": self.total_seconds, "stages": dict(stages)}
+
+
+class LatencyTracer(BaseCallbackHandler):
+    '''
+    Callback handler that records per-turn stage timings and token counts. Attach it to every callback
+    manager in play (Settings, the LLM, the embedding model and each agent).
+    '''
+
+    def __init__(self, tokenizer=None, max_turns=200):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self._token_counter = TokenCounter(tokenizer=tokenizer)
+        self._open = {}  # event_id -> (trace, stage, start, tool context token)
+        self._turns = deque(maxlen=max_turns)
+        self._metrics = defaultdict(lambda: {"count": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        self._turn_metrics = {"count": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def turn(self, session_id, query):
+        '''
+        Traces the enclosed chat turn; yields its TurnTrace.
+        '''
+        trace = TurnTrace(session_id, query)
+        token = _current_turn.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_turn.reset(token)
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, stage):
+        '''
+        Records the enclosed block as a span of the current turn, for work that raises no callback event.
+        '''
+        trace = _current_turn.get()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if trace is not None:
+                trace.add_span(stage, time.perf_counter() - start)
+
+    def traced_span(self, stage, fn):
+        '''
+        Wraps `fn` so that each call is recorded as a span of `stage`.
+        '''
+        def wrapper(*args, **kwargs):
+            with self.span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def recent_turns(self, session_id=None):
+        with self._lock:
+            return [trace for trace in self._turns if session_id is None or trace.session_id == session_id]
+
+    def render_metrics(self):
+        '''
+        Returns the aggregated stage metrics in the Prometheus text exposition format.
+        '''
+        with self._lock:
+            metrics = {stage: dict(values) for stage, values in self._metrics.items()}
+            turns = dict(self._turn_metrics)
+        lines = ["# TYPE vedabot_turn_seconds summary",
+                 f"vedabot_turn_seconds_sum {turns['seconds']}",
+                 f"vedabot_turn_seconds_count {turns['count']}",
+                 "# TYPE vedabot_stage_seconds summary"]
+        for stage, values in sorted(metrics.items()):
+            lines.append(f'vedabot_stage_seconds_sum{{stage="{stage}"}} {values["seconds"]}')
+            lines.append(f'vedabot_stage_seconds_count{{stage="{stage}"}} {values["count"]}')
+        lines.append("# TYPE vedabot_stage_tokens_total counter")
+        for stage, values in sorted(metrics.items()):
+            lines.append(f'vedabot_stage_tokens_total{{stage="{stage}",kind="prompt"}} {values["prompt_tokens"]}')
+            lines.append(f'vedabot_stage_tokens_total{{stage="{stage}",kind="completion"}} {values["completion_tokens"]}')
+        return "\n".join(lines) + "\n"
+
+    def on_event_start(self, event_type, payload=None, event_id="", parent_id="", **kwargs):
+        trace = _current_turn.get()
+        stage = self._stage(event_type, payload)
+        if trace is None or stage is None:
+            return event_id
+        tool_token = None
+        if event_type == CBEventType.LLM:
+            with self._lock:
+                if _current_llm.get() in self._open:
+                    # e.g. CustomLLM.chat wrapping complete: one call, two nested events
+                    return event_id
+            # never reset: a streamed call ends on another thread, and a finished id is no longer open
+            _current_llm.set(event_id)
+        if event_type == CBEventType.FUNCTION_CALL:
+            tool_token = _current_tool.set(stage)
+        with self._lock:
+            self._open[event_id] = (trace, stage, time.perf_counter(), tool_token)
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id="", **kwargs):
+        # looked up by event id: streamed LLM responses finish on another thread
+        with self._lock:
+            entry = self._open.pop(event_id, None)
+        if entry is None:
+            return
+        trace, stage, start, tool_token = entry
+        if tool_token is not None:
+            try:
+                _current_tool.reset(tool_token)
+            except ValueError:
+                pass
+        prompt_tokens, completion_tokens = self._tokens(event_type, payload or {})
+        trace.add_span(stage, time.perf_counter() - start, prompt_tokens, completion_tokens)
+
+    def start_trace(self, trace_id=None):
+        pass
+
+    def end_trace(self, trace_id=None, trace_map=None):
+        pass
+
+    def _stage(self, event_type, payload):
+        if event_type == CBEventType.LLM:
+            return "tool_llm" if _current_tool.get() is not None else "agent_llm"
+        if event_type == CBEventType.FUNCTION_CALL and payload is not None:
+            return f"tool:{payload[EventPayload.TOOL].name}"
+        if event_type == CBEventType.EMBEDDING:
+            return "embedding"
+        if event_type == CBEventType.RETRIEVE:
+            return "vector_query"
+        return None
+
+    def _tokens(self, event_type, payload):
+        try:
+            if event_type == CBEventType.LLM and payload:
+                counts = get_llm_token_counts(self._token_counter, payload)
+                return counts.prompt_token_count, counts.completion_token_count
+            if event_type == CBEventType.EMBEDDING:
+                chunks = payload.get(EventPayload.CHUNKS, [])
+                return sum(self._token_counter.get_string_tokens(chunk) for chunk in chunks), 0
+        except Exception:
+            logger.debug("Could not count tokens for %s", event_type, exc_info=True)
+        return 0, 0
+
+    def _finish(self, trace):
+        trace.total_seconds = time.perf_counter() - trace._start
+        # spans still open (e.g. a stream abandoned mid-way) end with the turn
+        now = time.perf_counter()
+        with self._lock:
+            unfinished = [event_id for event_id, entry in self._open.items() if entry[0] is trace]
+            for event_id in unfinished:
+                _, stage, start, _ = self._open.pop(event_id)
+                trace.add_span(stage, now - start)
+
+        summary = trace.summary()
+        with self._lock:
+            self._turns.append(trace)
+            self._turn_metrics["count"] += 1
+            self._turn_metrics["seconds"] += trace.total_seconds
+            for stage, values in summary["stages"].items():
+                metrics = self._metrics[stage]
+                metrics["count"] += values["calls"]
+                metrics["seconds"] += values["seconds"]
+                metrics["prompt_tokens"] += values["prompt_tokens"]
+                metrics["completion_tokens"] += values["completion_tokens"]
+        logger.info(json.dumps({"event": "chat_turn", **summary}, ensure_ascii=False))
@@ -0,0 +1,122 @@
+'''
+Construction of the bot's tools and ReAct agent, shared by every entry point (the Streamlit app, the
+replay harness). Nothing here reads secrets or touches Streamlit: callers pass in the LLM, the query
+engines and the callback handlers, and decide what to share between sessions.
+'''
+import pandas as pd
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.agent import AgentRunner, ReActAgentWorker, ReActChatFormatter
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.memory import ChatMemoryBuffer
+from llama_index.core.query_engine import PandasQueryEngine
+from llama_index.core.query_engine.pandas.output_parser import PandasInstructionParser
+from llama_index.core.tools import QueryEngineTool, ToolMetadata
+
+from FunctionTools import MantraToolSpec, ScriptureDescriptionToolSpec, VedaStatisticsToolSpec
+from ParallelTools import ParallelToolSpec
+from ToolCallHandler import ToolCallStreamHandler
+
+VEDA_DETAILS_CSV_PATH = "Data/veda_content_details.csv"
+MEMORY_TOKEN_LIMIT = 3900
+LLM_MODEL = "gpt-4-1106-preview"
+
+VECTOR_ENGINE_DESCRIPTION = '''Helpful to get semantic information from the documents. These documents containing comprehensive information about the Vedas.\
+                They also covers various aspects, including general details about the Vedas, fundamental terminology associated with Vedic literature, \
+                and detailed information about Vedamantras for each Veda. The Vedamantra details encompass essential elements such as padapatha, rishi, chandah,\
+                devata, and swarah.This tool is very useful to answer general questions related to vedas.\
+                Sample Query:\
+                1. What is the meaning of devata ?\
+                2. What are the different Brahmanas associated with SamaVeda?\
+                3. What is the difference between Shruti and Smriti.
+               '''
+
+PANDAS_ENGINE_DESCRIPTION = '''Helpful to answer the queries related to count from the documents that count_mantras, count_distinct and most_common cannot answer. This document is a .csv file with different columns containing comprehensive information about the Vedas.\
+                The column names as follows:\
+                'mantra_id', 'scripture_name', 'KandahNumber', 'PrapatakNumber','AnuvakNumber', 'MantraNumber', 'DevataName', 'RishiName', 'SwarahName', 'ChandaName',\
+                'padapatha', 'vedamantra', 'AdhyayaNumber', 'ArchikahNumber', 'ArchikahName', 'ShuktaNumber', 'keyShukta', 'ParyayaNumber', 'MandalaNumber'
+                ''This tool is very useful to answer questions related to vedas on.\
+                Sample Query:\
+                1. How many mantras are there in RigVeda whose swarah is gāndhāraḥ?\
+                2. How many different devata present in rigveda?\
+                3. Which Kandah has the maximum number of in KrishnaYajurVeda?
+                4. How many mantras are there in RigVeda?
+               '''
+
+CONTEXT = """
+  You are an expert on Vedas and related scriptures.\
+  Your role is to respond to questions about vedic scriptures and associated information based on available sources.\
+  For every query, you must use either any one of the tool or use available history/context.
+  Please provide well-informed answers. Don't use prior knowledge.
+"""
+PARALLEL_TOOLS_CONTEXT = """
+  When a question needs several tool calls that do not depend on each other, make them together with run_tools_in_parallel.
+"""
+
+
+def build_llm(api_key, callback_manager=None, http_client=None):
+    '''
+    Creates the OpenAI LLM. Pass an `http_client` (httpx.Client) to share a sized connection pool
+    between all the requests made through it.
+    '''
+    from llama_index.llms.openai import OpenAI
+    return OpenAI(temperature=0, model=LLM_MODEL, api_key=api_key, max_tokens=512,
+                  callback_manager=callback_manager, http_client=http_client)
+
+
+def build_vector_query_engine(vector_store):
+    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    index_store = VectorStoreIndex.from_vector_store(vector_store,storage_context=storage_context)
+    return index_store.as_query_engine(similarity_top_k=5,vector_store_query_mode ='hybrid',alpha=0.6)
+
+
+def build_pandas_query_engine(details_path=VEDA_DETAILS_CSV_PATH, tracer=None):
+    df_veda_details = pd.read_csv(details_path, encoding='utf-8')
+    instruction_parser = PandasInstructionParser(df_veda_details)
+    if tracer is not None:
+        # time the eval of the generated code separately from the LLM call that writes it
+        instruction_parser.parse = tracer.traced_span("pandas_execution", instruction_parser.parse)
+    return PandasQueryEngine(df=df_veda_details, instruction_parser=instruction_parser)
+
+
+def build_tools(vector_query_engine, pandas_query_engine, parallel_tools=True, max_workers=8, tracer=None,
+                mantra_spec=None):
+    '''
+    Returns the agent's tools. The query engines may be LazyQueryEngine proxies, and the tool specs
+    only load their data on first use, so this is cheap. With a tracer, calls made through
+    run_tools_in_parallel are traced per tool. Pass `mantra_spec` to share its loaded datasets with
+    other users of them (e.g. MantraExport).
+    '''
+    query_engine_tools = [
+        QueryEngineTool(query_engine=vector_query_engine,
+                        metadata=ToolMetadata(name="vector_engine", description=VECTOR_ENGINE_DESCRIPTION)),
+        QueryEngineTool(query_engine=pandas_query_engine,
+                        metadata=ToolMetadata(name="pandas_engine", description=PANDAS_ENGINE_DESCRIPTION)),
+    ]
+    mantra_tools = (mantra_spec or MantraToolSpec()).to_tool_list()
+    description_tools = ScriptureDescriptionToolSpec().to_tool_list()
+    statistics_tools = VedaStatisticsToolSpec().to_tool_list()
+    tools = [*mantra_tools,*description_tools,*statistics_tools,*query_engine_tools]
+    if parallel_tools:
+        # lets the agent plan independent calls in one step and run them concurrently
+        tools += ParallelToolSpec(tools, max_workers=max_workers, tracer=tracer).to_tool_list()
+    return tools
+
+
+def build_context(parallel_tools=True):
+    return CONTEXT + PARALLEL_TOOLS_CONTEXT if parallel_tools else CONTEXT
+
+
+def create_react_agent(tools, llm, context, chat_history=None, callback_handlers=(), verbose=True):
+    '''
+    Creates one session's ReActAgent: the tools and LLM are shared, the memory and the tool-call
+    handler (returned alongside the agent) belong to the session.
+    '''
+    tool_call_handler = ToolCallStreamHandler()
+    memory = ChatMemoryBuffer.from_defaults(chat_history=chat_history, token_limit=MEMORY_TOKEN_LIMIT)
+    callback_manager = CallbackManager([tool_call_handler, *callback_handlers])
+    # built from the worker rather than ReActAgent(.from_tools), which assign the session's callback
+    # manager to the shared LLM; LLM events keep going to the LLM's own (app-level) manager
+    worker = ReActAgentWorker(tools=tools, llm=llm, react_chat_formatter=ReActChatFormatter.from_context(context),
+                              callback_manager=callback_manager, verbose=verbose)
+    agent = AgentRunner(worker, memory=memory, llm=llm, callback_manager=callback_manager)
+    return {"agent": agent, "tool_call_handler": tool_call_handler}
@@ -0,0 +1,136 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from MantraIndex import normalize_key
+
+# Columns of veda_content_details.csv that count/aggregate questions group or filter by
+FACET_COLUMNS = ('scripture_name', 'MandalaNumber', 'KandahNumber', 'ArchikahNumber', 'ArchikahName',
+                 'PrapatakNumber', 'AnuvakNumber', 'AdhyayaNumber', 'ShuktaNumber', 'ParyayaNumber',
+                 'DevataName', 'RishiName', 'SwarahName', 'ChandaName')
+
+
+def facet_key(value):
+    '''
+    Normalizes a facet value for matching: numbers as in normalize_key, text lower-cased with
+    diacritics removed, so 'gāndhāraḥ' and 'Gandharah' match.
+    '''
+    key = normalize_key(value)
+    if key is None:
+        return None
+    decomposed = unicodedata.normalize('NFKD', key)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def exact_key(value):
+    '''
+    The value a facet is counted by: text as it is, numbers as in normalize_key (so 1 and 1.0 agree).
+    '''
+    if isinstance(value, str):
+        return value
+    return normalize_key(value)
+
+
+class VedaFacets:
+    '''
+    Precomputed aggregate table over the mantra catalogue.
+    Every facet column is dictionary-encoded on its exact values, and for each column a (scripture x value)
+    count matrix is built once, so counts, distinct counts and arg-max questions scoped to a scripture (and,
+    for counts, one more filter) are answered by indexing that matrix. Other filter combinations fall back
+    to a vectorized mask over the integer codes.
+    Filter values match a value exactly or, failing that, every value equal to it ignoring case and
+    diacritics, so 'Gandharah' finds 'gāndhāraḥ' without merging values that differ only in diacritics.
+    '''
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.columns = [column for column in FACET_COLUMNS if column in df]
+        self._codes = {}
+        self._categories = {}
+        self._matches = {}
+        self._labels = {}
+        for column in self.columns:
+            categorical = pd.Categorical([exact_key(value) for value in df[column].values])
+            self._codes[column] = np.asarray(categorical.codes)
+            self._categories[column] = {key: code for code, key in enumerate(categorical.categories)}
+            matches = {}
+            for code, key in enumerate(categorical.categories):
+                matches.setdefault(facet_key(key), []).append(code)
+            self._matches[column] = {key: np.array(codes) for key, codes in matches.items()}
+            self._labels[column] = list(categorical.categories)
+
+        scriptures = self._codes['scripture_name']
+        n_scriptures = len(self._labels['scripture_name'])
+        self._scripture_totals = np.bincount(scriptures[scriptures >= 0], minlength=n_scriptures)
+        self._tables = {}
+        for column in self.columns:
+            codes = self._codes[column]
+            valid = (scriptures >= 0) & (codes >= 0)
+            table = np.zeros((n_scriptures, len(self._labels[column])), dtype=np.int64)
+            np.add.at(table, (scriptures[valid], codes[valid]), 1)
+            self._tables[column] = table
+
+    def count(self, scripture_name=None, filters=None):
+        scripture_name, filters = self._resolve(scripture_name, filters)
+        scriptures = self._code('scripture_name', scripture_name)
+        if scriptures is not None and not len(scriptures):
+            return 0
+        if not filters:
+            return int(self.size if scriptures is None else self._scripture_totals[scriptures].sum())
+        if len(filters) == 1:
+            column, value = next(iter(filters.items()))
+            codes = self._code(column, value)
+            table = self._tables[column]
+            return int(table[:, codes].sum() if scriptures is None else table[np.ix_(scriptures, codes)].sum())
+        return int(self._mask(scriptures, filters).sum())
+
+    def count_distinct(self, column, scripture_name=None, filters=None):
+        return int((self.value_counts(column, scripture_name, filters) > 0).sum())
+
+    def most_common(self, column, scripture_name=None, filters=None, top_n=1):
+        counts = self.value_counts(column, scripture_name, filters)
+        order = np.argsort(-counts, kind='stable')[:top_n]
+        return [{"value": self._labels[column][code], "mantras": int(counts[code])}
+                for code in order if counts[code] > 0]
+
+    def value_counts(self, column, scripture_name=None, filters=None):
+        '''
+        Returns the number of matching mantras per value code of `column`.
+        '''
+        scripture_name, filters = self._resolve(scripture_name, filters, column)
+        scriptures = self._code('scripture_name', scripture_name)
+        table = self._tables[column]
+        if not filters:
+            return table.sum(axis=0) if scriptures is None else table[scriptures].sum(axis=0)
+        codes = self._codes[column]
+        selected = codes[self._mask(scriptures, filters) & (codes >= 0)]
+        return np.bincount(selected, minlength=table.shape[1])
+
+    def _resolve(self, scripture_name, filters, *columns):
+        # Validates the columns and drops empty filters; a scripture given as a filter is treated
+        # like the scripture_name argument so it can use the precomputed table
+        filters = {column: value for column, value in (filters or {}).items() if value is not None}
+        unknown = [column for column in [*filters, *columns] if column not in self._codes]
+        if unknown:
+            raise ValueError(f"Unknown column(s) {unknown}. Available columns: {self.columns}")
+        if scripture_name is None and 'scripture_name' in filters:
+            scripture_name = filters.pop('scripture_name')
+        return scripture_name, filters
+
+    def _code(self, column, value):
+        # None means "not filtered"; otherwise the codes of the matching values (empty if none occur)
+        if value is None:
+            return None
+        code = self._categories[column].get(exact_key(value))
+        if code is not None:
+            return np.array([code])
+        return self._matches[column].get(facet_key(value), np.array([], dtype=int))
+
+    def _mask(self, scriptures, filters):
+        mask = np.ones(self.size, dtype=bool)
+        if scriptures is not None:
+            mask &= np.isin(self._codes['scripture_name'], scriptures)
+        for column, value in filters.items():
+            mask &= np.isin(self._codes[column], self._code(column, value))
+        return mask
@@ -1,119 +1,137 @@
+import uuid
 import streamlit as st
-from llama_index.core import VectorStoreIndex, StorageContext, Document
-from llama_index.llms.openai import OpenAI
-import openai
-import pandas as pd
 from llama_index.core import Settings
-from llama_index.vector_stores.pinecone import PineconeVectorStore
-import pinecone
-from pinecone import Pinecone, PodSpec
-from llama_index.core.query_engine import PandasQueryEngine
-from llama_index.core.agent import ReActAgent
-from llama_index.core.memory import ChatMemoryBuffer
-from sentence_transformers import SentenceTransformer
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.llms import ChatMessage, MessageRole
 #from llama_index.indices.postprocessor import SimilarityPostprocessor
 #from llama_index.postprocessor import SentenceTransformerRerank
 import tiktoken
-from llama_index.core.callbacks import CallbackManager, TokenCountingHandler
-from llama_index.core.tools import QueryEngineTool, ToolMetadata
-from FunctionTools import ScriptureDescriptionToolSpec, MantraToolSpec
-
-
+from llama_index.core.callbacks import CallbackManager
+from AgentPool import AgentPool
+from AnswerCache import AnswerCache
+from LocalVectorStore import LOCAL_INDEX_PATH, LocalVectorStore
+from EmbeddingService import BatchingEmbedding, build_embed_model
+from ToolCache import tool_cache_stats
+from Tracing import LatencyTracer, configure_trace_logging
+import VedaAgent
+from VedaAgent import build_context, build_pandas_query_engine, build_tools, build_vector_query_engine
+from Startup import STARTUP_TIMINGS, LazyQueryEngine, timed_stage
+
+# Streamlit re-executes this script on every interaction. Everything expensive below is built
+# on first use behind st.cache_resource, so reruns only pay for the cached lookups.
 
 #load keys
 openai_api_key = st.secrets["OPENAI_APIKEY_CS"]
-pinecone_api_key = st.secrets["PINECONE_API_KEY_SAM"]
+# "pinecone" (default) or "local", the on-disk index built by `python src/LocalVectorStore.py`
+VECTOR_BACKEND = st.secrets.get("VECTOR_BACKEND", "pinecone")
+
+#tracing: per-turn stage timings and token counts, shared by every callback manager below
+@st.cache_resource(show_spinner=False)
+def get_tracer():
+    configure_trace_logging(st.secrets.get("TRACE_LOG_LEVEL", "INFO"))
+    with timed_stage("tokenizer"):
+        return LatencyTracer(
+            tokenizer=tiktoken.encoding_for_model(VedaAgent.LLM_MODEL).encode
+            )
+
+@st.cache_resource(show_spinner=False)
+def get_callback_manager():
+    return CallbackManager([get_tracer()])
 
 #llm
-llm_AI4 = OpenAI(temperature=0, model="gpt-4-1106-preview",api_key=openai_api_key, max_tokens=512)
-token_counter = TokenCountingHandler(
-    tokenizer=tiktoken.encoding_for_model("gpt-4-1106-preview").encode
-    )
-
-# global settings
-Settings.embed_model = HuggingFaceEmbedding(
-    model_name="BAAI/bge-large-en-v1.5",
-    embed_batch_size=8
-)
+@st.cache_resource(show_spinner=False)
+def get_llm():
+    with timed_stage("llm client"):
+        return VedaAgent.build_llm(openai_api_key, callback_manager=get_callback_manager())
+
+# embedding model: EMBED_BACKEND is "torch", "quantized" (int8, CPU) or "onnx". A different
+# EMBED_MODEL_NAME needs a vector index built with the same model.
+EMBED_MODEL_NAME = st.secrets.get("EMBED_MODEL_NAME", "BAAI/bge-large-en-v1.5")
+EMBED_BACKEND = st.secrets.get("EMBED_BACKEND", "torch")
+
+@st.cache_resource(show_spinner=False)
+def get_embed_model():
+    # query embeddings from all sessions go through one cache and micro-batcher
+    with timed_stage("embedding model"):
+        return BatchingEmbedding(build_embed_model(EMBED_MODEL_NAME, EMBED_BACKEND, embed_batch_size=8),
+                                 callback_manager=get_callback_manager())
+
+llm_AI4 = get_llm()
+
+# global settings; the callback manager first, as assigning Settings.llm gives the LLM the current one
+Settings.callback_manager = get_callback_manager()
 Settings.llm = llm_AI4 
 Settings.chunk_size = 512
 Settings.chunk_overlap = 50
-Settings.callback_manager = CallbackManager([token_counter])
-#memory for bot
-memory = ChatMemoryBuffer.from_defaults(token_limit=3900)
 
 #load vector database
-pc = Pinecone(api_key=pinecone_api_key)
-pinecone_index = pc.Index("pod-index")
-vector_store_pine = PineconeVectorStore(pinecone_index=pinecone_index)
-storage_context_pine = StorageContext.from_defaults(vector_store=vector_store_pine)
-index_store = VectorStoreIndex.from_vector_store(vector_store_pine,storage_context=storage_context_pine)
-query_engine_vector = index_store.as_query_engine(similarity_top_k=5,vector_store_query_mode ='hybrid',alpha=0.6)
+@st.cache_resource(show_spinner=False)
+def get_vector_store():
+    if VECTOR_BACKEND == "local":
+        with timed_stage("local vector index"):
+            return LocalVectorStore.load(LOCAL_INDEX_PATH)
+    from llama_index.vector_stores.pinecone import PineconeVectorStore
+    from pinecone import Pinecone
+    with timed_stage("pinecone index"):
+        pc = Pinecone(api_key=st.secrets["PINECONE_API_KEY_SAM"])
+        pinecone_index = pc.Index("pod-index")
+        return PineconeVectorStore(pinecone_index=pinecone_index)
+
+@st.cache_resource(show_spinner=False)
+def get_vector_query_engine():
+    Settings.embed_model = get_embed_model()
+    return build_vector_query_engine(get_vector_store())
+
 #pandas Engine
-df_veda_details = pd.read_csv("Data/veda_content_details.csv",encoding='utf-8')
-query_engine_pandas = PandasQueryEngine(df=df_veda_details)
-
-# Query Engine Tools
-query_engine_tools = [
-    QueryEngineTool(
-        query_engine=query_engine_vector,
-        metadata=ToolMetadata(
-            name="vector_engine",
-            description=(
-                '''Helpful to get semantic information from the documents. These documents containing comprehensive information about the Vedas.\
-                They also covers various aspects, including general details about the Vedas, fundamental terminology associated with Vedic literature, \
-                and detailed information about Vedamantras for each Veda. The Vedamantra details encompass essential elements such as padapatha, rishi, chandah,\
-                devata, and swarah.This tool is very useful to answer general questions related to vedas.\
-                Sample Query:\
-                1. What is the meaning of devata ?\
-                2. What are the different Brahmanas associated with SamaVeda?\
-                3. What is the difference between Shruti and Smriti.
-               '''
-            ),
-        ),
-    ),
-    QueryEngineTool(
-        query_engine=query_engine_pandas,
-        metadata=ToolMetadata(
-            name="pandas_engine",
-            description=(
-                '''Helpful to answer the queries related to count from the documents. This document is a .csv file with different columns containing comprehensive information about the Vedas.\
-                The column names as follows:\
-                'mantra_id', 'scripture_name', 'KandahNumber', 'PrapatakNumber','AnuvakNumber', 'MantraNumber', 'DevataName', 'RishiName', 'SwarahName', 'ChandaName',\
-                'padapatha', 'vedamantra', 'AdhyayaNumber', 'ArchikahNumber', 'ArchikahName', 'ShuktaNumber', 'keyShukta', 'ParyayaNumber', 'MandalaNumber'
-                ''This tool is very useful to answer questions related to vedas on.\
-                Sample Query:\
-                1. How many mantras are there in RigVeda whose swarah is gāndhāraḥ?\
-                2. How many different devata present in rigveda?\
-                3. Which Kandah has the maximum number of in KrishnaYajurVeda?
-                4. How many mantras are there in RigVeda?
-               '''
-            ),
-        ),
-    )
-    ]
+@st.cache_resource(show_spinner=False)
+def get_pandas_query_engine():
+    with timed_stage("veda details"):
+        return build_pandas_query_engine(tracer=get_tracer())
 
 # tools
-mantra_tools = MantraToolSpec().to_tool_list()
-description_tools = ScriptureDescriptionToolSpec().to_tool_list()
-tools = [*mantra_tools,*description_tools,*query_engine_tools]
+PARALLEL_TOOLS = st.secrets.get("PARALLEL_TOOLS", True)
 
-# context
-context = """
-  You are an expert on Vedas and related scriptures.\
-  Your role is to respond to questions about vedic scriptures and associated information based on available sources.\
-  For every query, you must use either any one of the tool or use available history/context.
-  Please provide well-informed answers. Don't use prior knowledge.
-"""
-
-# Function to create ReActAgent instance (change it based on your initialization logic)
-@st.cache_resource(show_spinner=False)  # Set allow_output_mutation to True for mutable objects like instances
-def create_react_agent():
-    return ReActAgent.from_tools(tools, llm=llm_AI4, context=context, verbose=True)
+@st.cache_resource(show_spinner=False)
+def get_tools():
+    # the query engines and tool specs only load their models and data on first use
+    return build_tools(LazyQueryEngine(get_vector_query_engine), LazyQueryEngine(get_pandas_query_engine),
+                       parallel_tools=PARALLEL_TOOLS, max_workers=8, tracer=get_tracer())
 
-# Example usage
-react_agent_instance = create_react_agent()
+# context
+context = build_context(PARALLEL_TOOLS)
+
+# session pool: idle sessions are evicted after SESSION_TTL_SECONDS, and the least recently used
+# one once more than MAX_SESSIONS are live
+MAX_SESSIONS = 200
+SESSION_TTL_SECONDS = 30 * 60
+
+@st.cache_resource(show_spinner=False)
+def get_agent_pool():
+    return AgentPool(max_sessions=MAX_SESSIONS, ttl_seconds=SESSION_TTL_SECONDS)
+
+# Function to create a per-session ReActAgent. Tools, LLM client and indices are shared;
+# memory and the tool-call handler belong to the session.
+def create_react_agent(chat_history=None):
+    return VedaAgent.create_react_agent(get_tools(), llm_AI4, context, chat_history=chat_history,
+                                        callback_handlers=[get_tracer()])
+
+# answer cache shared by all sessions: exact match on the normalized question, then nearest
+# cached question by embedding similarity. Only the first question of a conversation is looked up
+# or stored, as later ones can depend on what came before ("What is its adhibautic meaning?")
+ANSWER_CACHE_SIZE = 1000
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_SIMILARITY = 0.95
+
+@st.cache_resource(show_spinner=False)
+def get_answer_cache():
+    return AnswerCache(max_size=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+                       embed_fn=lambda text: get_embed_model().get_query_embedding(text),
+                       similarity_threshold=ANSWER_CACHE_SIMILARITY)
+
+def get_session():
+    # an evicted session is rebuilt with its visible chat history, so the conversation carries on
+    chat_history = [ChatMessage(role=MessageRole(message["role"]), content=message["content"])
+                    for message in st.session_state.messages[1:-1]]
+    return get_agent_pool().get(st.session_state.session_id, lambda: create_react_agent(chat_history))
 
 # Streamlit Components Initialization
 st.title("Svarupa Bot ")
@@ -123,9 +141,10 @@ if "messages" not in st.session_state.keys():
         {"role": "assistant", "content": "Hi. I am Svarupa AI Assistant. Ask me a question about Vedas!"}
     ]
 
-if "chat_engine" not in st.session_state.keys():
-    # Using st.cache_resource for caching the unserializable react_agent
-    st.session_state.chat_engine = create_react_agent()
+if "session_id" not in st.session_state.keys():
+    st.session_state.session_id = str(uuid.uuid4())
+
+stream_responses = st.sidebar.toggle("Stream responses", value=True)
 
 if prompt := st.chat_input("Your question"):
     st.session_state.messages.append({"role": "user", "content": prompt})
@@ -135,10 +154,75 @@ for message in st.session_state.messages:
         st.write(message["content"])
 
 if st.session_state.messages[-1]["role"] != "assistant":
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            # Using the cached chat_engine
-            response = st.session_state.chat_engine.chat(prompt)
-            st.write(response.response)
-            message = {"role": "assistant", "content": response.response}
-            st.session_state.messages.append(message)
+    prompt = st.session_state.messages[-1]["content"]
+    with get_tracer().turn(st.session_state.session_id, prompt) as trace:
+        session = get_session()
+        answer_cache = get_answer_cache()
+        # the greeting and this prompt only
+        standalone = len(st.session_state.messages) <= 2
+        cached_answer = None
+        if standalone:
+            with get_tracer().span("answer_cache"):
+                cached_answer = answer_cache.get(prompt)
+        with st.chat_message("assistant"):
+            if cached_answer is not None:
+                # keep the agent's memory in step with what the user saw, for follow-up questions
+                answer = cached_answer
+                st.write(answer)
+                session["agent"].memory.put(ChatMessage(role=MessageRole.USER, content=prompt))
+                session["agent"].memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=answer))
+            elif stream_responses:
+                # Tool calls are shown as the ReAct loop makes them, then the final answer streams token by token
+                tool_status = st.status("Thinking...")
+
+                def show_tool_event(event):
+                    if event["type"] == "tool_call":
+                        tool_status.write(f"Calling `{event['tool']}` with `{event['content']}`")
+                    else:
+                        tool_status.write(f"`{event['tool']}` returned: {event['content'][:500]}")
+
+                tool_call_handler = session["tool_call_handler"]
+                tool_call_handler.on_tool_event = show_tool_event
+                try:
+                    response = session["agent"].stream_chat(prompt)
+                finally:
+                    tool_call_handler.on_tool_event = None
+                tool_status.update(label="Answer", state="complete", expanded=False)
+                answer = st.write_stream(response.response_gen)
+            else:
+                with st.spinner("Thinking..."):
+                    response = session["agent"].chat(prompt)
+                    answer = response.response
+                    st.write(answer)
+            if standalone and cached_answer is None:
+                answer_cache.put(prompt, answer)
+        message = {"role": "assistant", "content": answer}
+        st.session_state.messages.append(message)
+    st.session_state.last_trace = trace.summary()
+
+with st.sidebar.expander("Latency breakdown"):
+    if "last_trace" in st.session_state:
+        last_trace = st.session_state.last_trace
+        st.write(f"Last turn: {last_trace['total_seconds']:.2f}s")
+        st.table([{"stage": stage, **values} for stage, values in last_trace["stages"].items()])
+
+with st.sidebar.expander("Metrics"):
+    # the same Prometheus text the headless server serves at /metrics
+    metrics_text = get_tracer().render_metrics()
+    st.code(metrics_text, language="text")
+    st.download_button("Download metrics", metrics_text, file_name="vedabot_metrics.txt", mime="text/plain")
+
+with st.sidebar.expander("Answer cache"):
+    st.write(get_answer_cache().stats())
+
+with st.sidebar.expander("Tool caches"):
+    st.write(tool_cache_stats())
+
+with st.sidebar.expander("Query embeddings"):
+    # only once the model has been loaded, so the panel never triggers the load itself
+    if "embedding model" in STARTUP_TIMINGS:
+        st.write(get_embed_model().stats())
+
+with st.sidebar.expander("Startup timings"):
+    for stage, seconds in STARTUP_TIMINGS.items():
+        st.write(f"{stage}: {seconds:.2f}s")
@@ -0,0 +1,404 @@
+'''
+Headless HTTP/WebSocket server for the bot: the same tools, indices and agent construction as the
+Streamlit app (see VedaAgent), for programmatic clients and load-balanced deployments.
+
+    uvicorn server:app --app-dir src --host 0.0.0.0 --port 8000 --workers 4
+
+Each worker process holds its own LLM client, indices, caches and session pool; put the workers
+behind a load balancer with session affinity so a session keeps its agent memory (a session that
+lands elsewhere starts over, or from the `history` the client sends).
+
+Endpoints:
+    POST /chat      {"message", "session_id"?, "history"?, "stream"?}
+                    -> {"session_id", "answer", "cached", "trace"}, or with "stream": true a
+                       JSON Lines stream of tool_call / tool_output / token events and a final done event
+    WS   /ws/chat   the same request objects as messages, answered with the streamed events
+    GET  /health    liveness
+    GET  /metrics   per-stage latency and token metrics in the Prometheus text format
+    GET  /stats     cache, session and startup statistics
+    GET  /mantras/export?scripture_name=RigVeda&MandalaNumber=1&ShuktaNumber=1-10&format=jsonl|parquet
+                    -> every mantra in the address range with its details, summary and translations,
+                       streamed as JSON Lines or returned as a Parquet file (see MantraExport)
+    POST /mantras/lookup {"mantra_ids", "format"?} -> the same records for a list of mantra ids
+
+Configuration comes from environment variables with the names of the app's Streamlit secrets
+(OPENAI_APIKEY_CS, PINECONE_API_KEY_SAM, VECTOR_BACKEND, EMBED_MODEL_NAME, EMBED_BACKEND,
+PARALLEL_TOOLS) plus the concurrency settings below.
+'''
+import asyncio
+import functools
+import json
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from typing import List, Optional
+
+import httpx
+import tiktoken
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from llama_index.core import Settings
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.llms import ChatMessage, MessageRole
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
+
+import VedaAgent
+from AgentPool import AgentPool
+from AnswerCache import AnswerCache
+from EmbeddingService import BatchingEmbedding, build_embed_model
+from FunctionTools import MantraToolSpec
+from LocalVectorStore import LOCAL_INDEX_PATH, LocalVectorStore
+from MantraExport import MantraExporter, iter_jsonl, write_parquet
+from Startup import STARTUP_TIMINGS, LazyQueryEngine, timed_stage
+from ToolCache import tool_cache_stats
+from Tracing import LatencyTracer, configure_trace_logging
+
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "pinecone")
+EMBED_MODEL_NAME = os.environ.get("EMBED_MODEL_NAME", "BAAI/bge-large-en-v1.5")
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "torch")
+PARALLEL_TOOLS = os.environ.get("PARALLEL_TOOLS", "true").lower() in ("1", "true", "yes")
+
+# agent turns run on a pool of this many threads; requests beyond it wait up to
+# QUEUE_TIMEOUT_SECONDS for a slot and are then rejected with 503 so the load balancer can retry elsewhere
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("MAX_CONCURRENT_REQUESTS", 16))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("QUEUE_TIMEOUT_SECONDS", 30))
+# keep-alive connections shared by all OpenAI calls, and Pinecone's request threads
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", 2 * MAX_CONCURRENT_REQUESTS))
+PINECONE_POOL_THREADS = int(os.environ.get("PINECONE_POOL_THREADS", MAX_CONCURRENT_REQUESTS))
+
+MAX_SESSIONS = 1000
+SESSION_TTL_SECONDS = 30 * 60
+ANSWER_CACHE_SIZE = 1000
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_SIMILARITY = 0.95
+
+# Shared resources, built once per process on first use (the counterpart of st.cache_resource)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tracer():
+    configure_trace_logging(os.environ.get("TRACE_LOG_LEVEL", "INFO"))
+    with timed_stage("tokenizer"):
+        return LatencyTracer(tokenizer=tiktoken.encoding_for_model(VedaAgent.LLM_MODEL).encode)
+
+
+@functools.lru_cache(maxsize=None)
+def get_callback_manager():
+    return CallbackManager([get_tracer()])
+
+
+@functools.lru_cache(maxsize=None)
+def get_http_client():
+    limits = httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS)
+    return httpx.Client(limits=limits, timeout=httpx.Timeout(60.0, connect=5.0))
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm():
+    with timed_stage("llm client"):
+        return VedaAgent.build_llm(os.environ["OPENAI_APIKEY_CS"], callback_manager=get_callback_manager(),
+                                   http_client=get_http_client())
+
+
+@functools.lru_cache(maxsize=None)
+def get_embed_model():
+    with timed_stage("embedding model"):
+        return BatchingEmbedding(build_embed_model(EMBED_MODEL_NAME, EMBED_BACKEND, embed_batch_size=8),
+                                 callback_manager=get_callback_manager())
+
+
+@functools.lru_cache(maxsize=None)
+def get_vector_store():
+    if VECTOR_BACKEND == "local":
+        with timed_stage("local vector index"):
+            return LocalVectorStore.load(LOCAL_INDEX_PATH)
+    from llama_index.vector_stores.pinecone import PineconeVectorStore
+    from pinecone import Pinecone
+    with timed_stage("pinecone index"):
+        # one client per process: its connection pool is shared by every query
+        pc = Pinecone(api_key=os.environ["PINECONE_API_KEY_SAM"], pool_threads=PINECONE_POOL_THREADS)
+        pinecone_index = pc.Index("pod-index")
+        return PineconeVectorStore(pinecone_index=pinecone_index)
+
+
+@functools.lru_cache(maxsize=None)
+def get_vector_query_engine():
+    return VedaAgent.build_vector_query_engine(get_vector_store())
+
+
+@functools.lru_cache(maxsize=None)
+def get_pandas_query_engine():
+    with timed_stage("veda details"):
+        return VedaAgent.build_pandas_query_engine(tracer=get_tracer())
+
+
+@functools.lru_cache(maxsize=None)
+def get_tools():
+    return VedaAgent.build_tools(LazyQueryEngine(get_vector_query_engine), LazyQueryEngine(get_pandas_query_engine),
+                                 parallel_tools=PARALLEL_TOOLS, max_workers=8, tracer=get_tracer(),
+                                 mantra_spec=get_mantra_spec())
+
+
+@functools.lru_cache(maxsize=None)
+def get_agent_pool():
+    return AgentPool(max_sessions=MAX_SESSIONS, ttl_seconds=SESSION_TTL_SECONDS)
+
+
+@functools.lru_cache(maxsize=None)
+def get_answer_cache():
+    return AnswerCache(max_size=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+                       embed_fn=lambda text: get_embed_model().get_query_embedding(text),
+                       similarity_threshold=ANSWER_CACHE_SIMILARITY)
+
+
+@functools.lru_cache(maxsize=None)
+def get_mantra_spec():
+    # shared by the agent's mantra tools and the exporter, so the datasets are loaded once
+    return MantraToolSpec()
+
+
+@functools.lru_cache(maxsize=None)
+def get_exporter():
+    return MantraExporter(get_mantra_spec())
+
+
+def configure_settings():
+    # the callback manager first: assigning Settings.llm/embed_model gives them the current one
+    Settings.callback_manager = get_callback_manager()
+    Settings.llm = get_llm()
+    Settings.embed_model = get_embed_model()
+    Settings.chunk_size = 512
+    Settings.chunk_overlap = 50
+
+
+def create_session(history=None):
+    chat_history = [ChatMessage(role=MessageRole(message.role), content=message.content) for message in history or []]
+    session = VedaAgent.create_react_agent(get_tools(), get_llm(), VedaAgent.build_context(PARALLEL_TOOLS),
+                                           chat_history=chat_history, callback_handlers=[get_tracer()],
+                                           verbose=False)
+    # an agent's memory is not thread-safe, so turns of one session run one at a time
+    session["lock"] = threading.Lock()
+    return session
+
+
+def run_turn(session_id, message, history=None, on_event=None):
+    '''
+    Answers one message in a worker thread. With `on_event`, tool calls and answer tokens are
+    reported through it as they happen.
+    '''
+    session = get_agent_pool().get(session_id, lambda: create_session(history))
+    answer_cache = get_answer_cache()
+    tracer = get_tracer()
+    with session["lock"], tracer.turn(session_id, message) as trace:
+        # only the first question of a conversation can be answered from (or stored in) the shared
+        # cache; later ones can refer back to earlier turns
+        standalone = not session["agent"].memory.get_all()
+        answer = None
+        if standalone:
+            with tracer.span("answer_cache"):
+                answer = answer_cache.get(message)
+        cached = answer is not None
+        if cached:
+            # keep the agent's memory in step with what the client saw, for follow-up questions
+            session["agent"].memory.put(ChatMessage(role=MessageRole.USER, content=message))
+            session["agent"].memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=answer))
+            if on_event is not None:
+                on_event({"type": "token", "content": answer})
+        elif on_event is not None:
+            tool_call_handler = session["tool_call_handler"]
+            tool_call_handler.on_tool_event = on_event
+            try:
+                response = session["agent"].stream_chat(message)
+            finally:
+                tool_call_handler.on_tool_event = None
+            tokens = []
+            for token in response.response_gen:
+                tokens.append(token)
+                on_event({"type": "token", "content": token})
+            answer = "".join(tokens)
+        else:
+            answer = session["agent"].chat(message).response
+        if standalone and not cached:
+            answer_cache.put(message, answer)
+    return {"session_id": session_id, "answer": answer, "cached": cached, "trace": trace.summary()}
+
+
+# Request handling
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="chat")
+_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+
+async def acquire_slot():
+    try:
+        await asyncio.wait_for(_slots.acquire(), timeout=QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, retry later.", headers={"Retry-After": "1"})
+
+
+class HistoryMessage(BaseModel):
+    role: str
+    content: str
+
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+    history: Optional[List[HistoryMessage]] = None
+    stream: bool = False
+
+
+class LookupRequest(BaseModel):
+    mantra_ids: List[str]
+    format: str = "jsonl"
+
+
+def start_turn(request, session_id):
+    '''
+    Starts a turn in the worker pool on a slot the caller holds and returns an async iterator over its
+    events. The slot is released when the turn ends, whether or not the events are ever read (a client
+    can disconnect before the response body starts).
+    '''
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def emit(event):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    def run():
+        try:
+            result = run_turn(session_id, request.message, request.history, on_event=emit)
+            emit({"type": "done", **result})
+        except Exception as e:
+            emit({"type": "error", "session_id": session_id, "content": str(e)})
+        finally:
+            emit(None)
+
+    future = loop.run_in_executor(_executor, run)
+    future.add_done_callback(lambda _: _slots.release())
+
+    async def stream():
+        # a disconnected client does not stop the turn
+        while (event := await events.get()) is not None:
+            yield event
+    return stream()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    configure_settings()
+    get_tools()
+    yield
+    _executor.shutdown(wait=False, cancel_futures=True)
+    get_http_client().close()
+
+
+app = FastAPI(title="Svarupa Bot", lifespan=lifespan)
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    session_id = request.session_id or str(uuid.uuid4())
+    await acquire_slot()
+    if request.stream:
+        turn_events = start_turn(request, session_id)
+
+        async def body():
+            async with aclosing(turn_events) as events:
+                async for event in events:
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, run_turn, session_id, request.message, request.history)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to answer. {e}")
+    finally:
+        _slots.release()
+
+
+@app.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket):
+    await websocket.accept()
+    session_id = str(uuid.uuid4())
+    try:
+        while True:
+            try:
+                request = ChatRequest(**await websocket.receive_json())
+            except (ValidationError, TypeError, ValueError) as e:
+                await websocket.send_json({"type": "error", "session_id": session_id, "content": str(e)})
+                continue
+            session_id = request.session_id or session_id
+            try:
+                await acquire_slot()
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "session_id": session_id, "content": e.detail})
+                continue
+            async with aclosing(start_turn(request, session_id)) as events:
+                async for event in events:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return get_tracer().render_metrics()
+
+
+@app.get("/stats")
+async def stats():
+    return {"sessions": len(get_agent_pool()), "answer_cache": get_answer_cache().stats(),
+            "tool_caches": tool_cache_stats(), "query_embeddings": get_embed_model().stats(),
+            "startup_timings": STARTUP_TIMINGS}
+
+
+async def export_response(positions, format):
+    '''
+    JSON Lines are streamed record by record; Parquet is written to a temporary file first, as its
+    footer is only known at the end, and the file is removed once sent.
+    '''
+    records = get_exporter().iter_records(positions)
+    if format == "jsonl":
+        return StreamingResponse(iter_jsonl(records), media_type="application/x-ndjson")
+    if format != "parquet":
+        raise HTTPException(status_code=400, detail=f"Unknown format {format!r}. Expected jsonl or parquet.")
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, write_parquet, records, path)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=f"Failed to export mantras. {e}")
+    return FileResponse(path, media_type="application/vnd.apache.parquet", filename="mantras.parquet",
+                        background=BackgroundTask(os.remove, path))
+
+
+@app.get("/mantras/export")
+async def export_mantras(request: Request, scripture_name: str, format: str = "jsonl"):
+    # every other query parameter is an address level selector, e.g. ShuktaNumber=1-10
+    selectors = {key: value for key, value in request.query_params.items() if key not in ("scripture_name", "format")}
+    # the first call loads the mantra datasets, so it must not run on the event loop
+    loop = asyncio.get_running_loop()
+    try:
+        positions = await loop.run_in_executor(None, functools.partial(get_exporter().select, scripture_name,
+                                                                       **selectors))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await export_response(positions, format)
+
+
+@app.post("/mantras/lookup")
+async def lookup_mantras(request: LookupRequest):
+    loop = asyncio.get_running_loop()
+    positions = await loop.run_in_executor(None, get_exporter().select_ids, request.mantra_ids)
+    return await export_response(positions, request.format)